@@ -1,15 +1,19 @@
 # 移除现有依赖
 # import telegram
 
-# 确保requests库已导入
-import requests
 import json
 import os
 import logging
+import multiprocessing
 import subprocess
+import sys
+import importlib.util
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Iterator, Optional, Tuple
+
+import metrics
 
 
 # --------------------------
@@ -26,6 +30,10 @@ class EnvConfig:
     LARK_APP_ID = os.getenv("LARK_APP_ID")      # 可选：飞书应用ID
     LARK_APP_SECRET = os.getenv("LARK_APP_SECRET")  # 可选：飞书应用密钥
     LARK_ALERT_KEY = os.getenv("LARK_ALERT_KEY", LARK_KEY)  # 告警机器人Key，默认同主Key
+    LARK_CHAT_ID = os.getenv("LARK_CHAT_ID")    # 可选：文件消息接收群ID
+
+    # T-Bot批量触发：每处理K个用户推送一次，0表示全部用户处理完后统一推送一次
+    TBOT_FLUSH_EVERY = int(os.getenv("TBOT_FLUSH_EVERY", "0"))
 
 
 class PathConfig:
@@ -34,6 +42,8 @@ class PathConfig:
     OUT_PUT_DIR = Path("../output/")  # 用户数据目录
     USER_DATA_DIR = Path("../../TypeScript/tweets/user/")  # 用户数据目录
     LOG_DIR = Path("../logs/")  # 日志目录
+    XBOT_SCRIPT = Path(__file__).with_name("X-Bot.py")  # X-Bot脚本路径
+    TBOT_SCRIPT = Path(__file__).with_name("T-Bot.py")  # T-Bot脚本路径 (复用其飞书通知器)
 
 
 class MsgConfig:
@@ -127,13 +137,15 @@ def send_telegram_alert(screen_name: str) -> bool:
 lark_notifier = None
 
 def initialize_notifier():
-    """初始化飞书通知器"""
+    """初始化飞书通知器 (复用T-Bot的LarkNotifier，共享限速调度与上传实现)"""
     global lark_notifier
     if EnvConfig.LARK_KEY:
-        lark_notifier = LarkNotifier(
-            EnvConfig.LARK_KEY, 
-            EnvConfig.LARK_APP_ID, 
-            EnvConfig.LARK_APP_SECRET
+        tbot = load_script("t_bot", PathConfig.TBOT_SCRIPT)
+        lark_notifier = tbot.LarkNotifier(
+            EnvConfig.LARK_KEY,
+            EnvConfig.LARK_APP_ID,
+            EnvConfig.LARK_APP_SECRET,
+            EnvConfig.LARK_CHAT_ID
         )
         logger.info("✅ 飞书通知器已初始化")
     else:
@@ -215,6 +227,44 @@ def load_config() -> List[str]:
         return []
 
 
+def load_script(module_name: str, script_path: Path):
+    """
+    以模块方式加载同目录下的脚本 (文件名含连字符，无法直接import)
+    返回模块对象，重复调用时复用已加载的模块
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, script_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module  # 注册模块名，保证其中的类与函数可被pickle
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_xbot():
+    """加载X-Bot模块"""
+    return load_script("x_bot", PathConfig.XBOT_SCRIPT)
+
+
+# 全局X-Bot实例：所有用户共享同一个XBotCore与已处理ID索引
+xbot = None
+xbot_core = None
+
+def initialize_xbot():
+    """加载X-Bot并创建共享的处理核心 (历史分片只加载一次)"""
+    global xbot, xbot_core
+    xbot = load_xbot()
+    xbot_core = xbot.XBotCore()
+    logger.info("✅ X-Bot处理核心已初始化")
+
+
+def shutdown_xbot():
+    """释放X-Bot持有的分片日志与索引"""
+    if xbot_core is not None:
+        xbot_core.close()
+
+
+@metrics.timed("ini.process_user")
 def process_user(screen_name: str) -> int:
     """
     处理单个用户数据
@@ -226,67 +276,95 @@ def process_user(screen_name: str) -> int:
         logger.warning(f"⏭️ 用户数据文件不存在: {data_file}")
         return 0
 
-    logger.info("🚀 触发X-Bot执行")
+    logger.info("🚀 调用X-Bot处理")
 
     try:
-        # 执行X-Bot处理（实时显示日志）
-        process = subprocess.Popen(
-            ["python", "-u", "X-Bot.py", str(data_file)],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,  # 合并错误输出
-            text=False,
-            bufsize=1  # 启用行缓冲
-        )
+        result = xbot.process_file(xbot_core, str(data_file))
+        new_count = result["new_count"]
+        logger.info(f"✅ X-Bot执行成功，用户 {screen_name} 处理完成，新增 {new_count} 条")
+        return new_count
 
-        # 实时打印输出并捕获最后结果
-        output_lines = []
-        for line in iter(process.stdout.readline, b''):
-            try:
-                line = line.decode('utf-8').strip()
-                if line:  # 过滤空行
-                    # 实时打印到父进程控制台
-                    print(f"[X-Bot] {line}", flush=True)
-                    output_lines.append(line)
-            except UnicodeDecodeError:
-                # 如果UTF-8解码失败，尝试使用其他编码
-                try:
-                    line = line.decode('gbk').strip()
-                    if line:
-                        print(f"[X-Bot] {line}", flush=True)
-                        output_lines.append(line)
-                except UnicodeDecodeError:
-                    # 如果仍然失败，跳过该行
-                    print("[X-Bot] [无法解码的行]", flush=True)
+    except Exception as e:
+        error_msg = f"❌ 用户 {screen_name} 处理失败: {str(e)[:200]}"
+        logger.error(error_msg, exc_info=True)
+        send_lark_alert(error_msg)
+        return 0
 
-        # 等待进程结束
-        process.wait()
 
-        # 检查退出码
-        if process.returncode != 0:
-            raise subprocess.CalledProcessError(
-                process.returncode,
-                process.args,
-                output='\n'.join(output_lines)
-            )
+def collect_user_candidates(data_file: str):
+    """
+    工作进程任务：解析单个用户数据文件
+    返回批内去重后的候选条目与用户顺序 (不读写分片，由主进程统一提交)
+    """
+    return load_xbot().collect_day_candidates(data_file)
+
 
-        # 解析倒数第二行作为结果
-        new_count = int(output_lines[-2]) if output_lines else 0
+@metrics.timed("ini.commit_user")
+def commit_user(screen_name: str, future: Optional[Future]) -> int:
+    """
+    协调端：等待工作进程解析结果并提交到分片与当日输出
+    返回新增条目数
+    """
+    if future is None:
+        logger.warning(f"⏭️ 用户数据文件不存在: {PathConfig.USER_DATA_DIR / f'{screen_name}.json'}")
+        return 0
+
+    try:
+        candidates, user_order = future.result()
+        data_file = PathConfig.USER_DATA_DIR / f"{screen_name}.json"
+        result = xbot.commit_file(xbot_core, str(data_file), candidates, user_order)
+        new_count = result["new_count"]
         logger.info(f"✅ X-Bot执行成功，用户 {screen_name} 处理完成，新增 {new_count} 条")
         return new_count
 
-    except subprocess.CalledProcessError as e:
-        error_msg = f"❌ 用户 {screen_name} 处理失败: {e.output.splitlines()[-1][:200]}"
-        logger.error(error_msg)
-        send_lark_alert(error_msg)
-        return 0
-    except ValueError:
-        logger.error(f"⚠️ 无效的输出内容: {output_lines[-2][:200]}")
-        return 0
     except Exception as e:
-        logger.error(f"🚨 未知错误: {str(e)}")
+        error_msg = f"❌ 用户 {screen_name} 处理失败: {str(e)[:200]}"
+        logger.error(error_msg, exc_info=True)
+        send_lark_alert(error_msg)
         return 0
 
 
+def process_users(users: List[str], workers: int = 1) -> Iterator[Tuple[str, int]]:
+    """
+    按配置顺序依次产出 (screen_name, 新增条目数)
+    workers>1 时多进程并行解析各用户数据，主进程按用户顺序统一去重并写入分片/输出，结果与串行一致
+    """
+    if workers <= 1 or len(users) <= 1:
+        for screen_name in users:
+            logger.info(f"\n{'=' * 40}\n🔍 开始处理: {screen_name}")
+            yield screen_name, process_user(screen_name)
+        return
+
+    logger.info(f"⚙️ 并行模式：{len(users)} 个用户，{workers} 个工作进程")
+    # 使用spawn启动工作进程：此时飞书发送线程、令牌刷新定时器等已在运行，fork可能复制其持有的锁而死锁
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {}
+        for screen_name in users:
+            data_file = PathConfig.USER_DATA_DIR / f"{screen_name}.json"
+            if data_file.exists():
+                futures[screen_name] = executor.submit(collect_user_candidates, str(data_file))
+
+        for screen_name in users:
+            logger.info(f"\n{'=' * 40}\n🔍 开始提交: {screen_name}")
+            yield screen_name, commit_user(screen_name, futures.get(screen_name))
+
+
+def parse_parallel_arg(args: List[str]) -> int:
+    """
+    解析 --parallel N 参数
+    返回工作进程数，默认1 (串行)
+    """
+    if "--parallel" not in args:
+        return 1
+    pos = args.index("--parallel")
+    try:
+        return max(1, int(args[pos + 1]))
+    except (IndexError, ValueError):
+        logger.error("❗ --parallel 需要指定正整数进程数")
+        sys.exit(1)
+
+
+@metrics.timed("ini.trigger_tbot")
 def trigger_tbot() -> bool:
     """
     触发下游处理流程
@@ -343,144 +421,20 @@ def trigger_tbot() -> bool:
         return False
 
 
+def flush_tbot(staged_users: List[str]) -> None:
+    """为已暂存的一批用户统一触发一次T-Bot"""
+    logger.info(f"📦 批量推送: {len(staged_users)} 个用户的新增内容")
+    if not trigger_tbot():
+        send_lark_alert(f"触发T-Bot失败 - 用户: {', '.join(staged_users)}")
 
-class LarkNotifier:
-    """飞书通知服务"""
-    
-    def __init__(self, lark_key, app_id=None, app_secret=None):
-        self.webhook_url = f"https://open.feishu.cn/open-apis/bot/v2/hook/{lark_key}"
-        self.app_id = app_id
-        self.app_secret = app_secret
-        self.access_token = None
-        
-    def send_text(self, content, is_alert=False):
-        """发送文本消息"""
-        prefix = "🔔 告警通知\n" if is_alert else "📢 动态更新\n"
-        payload = {
-            "msg_type": "text",
-            "content": {"text": f"{prefix}{content}"}
-        }
-        return self._send_request(payload)
-    
-    def send_rich_text(self, title, content, screen_name=None, publish_time=None):
-        """发送富文本消息"""
-        # 构建zh_cn语言的内容
-        zh_cn_content = []
-        
-        # 添加标题
-        if title:
-            zh_cn_content.append([{"tag": "text", "text": f"{title}"}])
-        
-        # 添加标签和发布时间
-        tags = []
-        if screen_name:
-            tags.append([
-                {"tag": "text", "text": "#"},
-                {"tag": "text", "text": screen_name, "style": {"color": "#3370ff"}}
-            ])
-        
-        if publish_time:
-            formatted_time = publish_time
-            if isinstance(publish_time, datetime):
-                formatted_time = publish_time.strftime("%Y-%m-%d %H:%M:%S")
-            tags.append([{"tag": "text", "text": f"发布时间: {formatted_time}"}])
-            
-        if tags:
-            zh_cn_content.extend(tags)
-        
-        # 添加主要内容
-        if content:
-            zh_cn_content.append([{"tag": "text", "text": content}])
-        
-        payload = {
-            "msg_type": "post",
-            "content": {
-                "post": {
-                    "zh_cn": {
-                        "title": title or "推文更新",
-                        "content": zh_cn_content
-                    }
-                }
-            }
-        }
-        return self._send_request(payload)
-    
-    def _send_request(self, payload):
-        """发送请求到飞书"""
-        try:
-            response = requests.post(
-                self.webhook_url, 
-                json=payload, 
-                timeout=10
-            )
-            response.raise_for_status()
-            
-            # 处理响应
-            result = response.json()
-            if result.get("code") == 0:
-                logger.info("✅ 飞书消息发送成功")
-                return True, result.get("message", "")
-            else:
-                logger.error(f"❌ 飞书响应错误: {result}")
-                return False, result.get("msg", "未知错误")
-                
-        except Exception as e:
-            logger.error(f"🚨 飞书消息发送失败: {str(e)}", exc_info=True)
-            return False, str(e)
-
-    def upload_media_to_lark(self, file_path, item):
-        """上传媒体文件到飞书"""
-        # 判断文件类型
-        file_type = self._detect_file_type(file_path)
-        
-        # 构建基础消息内容
-        screen_name = item['user']['screen_name']
-        publish_time = datetime.fromisoformat(item['publish_time']).strftime("%Y-%m-%d %H:%M:%S")
-        text_content = item.get('full_text', '')
-        
-        # 如果是图片，直接发送图片消息
-        if file_type == 'image':
-            return self._send_image(file_path, screen_name, publish_time, text_content)
-        
-        # 如果是视频或其他类型文件，使用文件分享方式
-        elif file_type in ['video', 'audio', 'file']:
-            return self._share_file(file_path, screen_name, publish_time, text_content, file_type)
-        
-        # 如果是特殊类型(广播/空间)，发送普通文本消息
-        else:
-            return self.send_rich_text(
-                title=f"#{screen_name} 更新了{file_type}",
-                content=text_content,
-                publish_time=publish_time
-            )
-
-    def _send_image(self, file_path, screen_name, publish_time, text_content):
-        """发送图片消息到飞书"""
-        # 飞书要求先上传图片获取image_key，再发送图片消息
-        
-        # 1. 获取上传凭证(调用飞书API)
-        
-        # 2. 上传图片文件获取image_key
-        
-        # 3. 发送图片消息，附带文本信息
-        # ...这里需要调用飞书API实现，具体代码略
-        
-        # 示例返回
-        return True, "图片消息已发送"
-
-    def _share_file(self, file_path, screen_name, publish_time, text_content, file_type):
-        """共享文件到飞书"""
-        # 类似图片上传过程，但使用文件上传API
-        # ...具体代码略
-        
-        # 示例返回
-        return True, "文件已共享"
 
 # --------------------------
 # 主流程
 # --------------------------
 def main():
     """主处理流程"""
+    workers = parse_parallel_arg(sys.argv[1:])
+
     # 初始化飞书通知器
     initialize_notifier()
     
@@ -504,11 +458,13 @@ def main():
         send_lark_alert(error_msg)
         return
 
-    # 遍历处理用户
+    # 加载X-Bot (所有用户共享同一处理核心)
+    initialize_xbot()
+
+    # 遍历处理用户 (新增内容先写入当日文件暂存，按批次触发T-Bot)
     total_new = 0
-    for screen_name in users:
-        logger.info(f"\n{'=' * 40}\n🔍 开始处理: {screen_name}")
-        new_count = process_user(screen_name)
+    staged_users = []
+    for screen_name, new_count in process_users(users, workers):
 
         # 处理新增条目
         if new_count > 0:
@@ -516,13 +472,21 @@ def main():
             send_lark_message(screen_name, new_count)
             logger.info(f"✅ 用户 {screen_name} 有 {new_count} 条新内容，已发送通知")
 
-        # 触发下游流程
-        if not trigger_tbot():
-            send_lark_alert(f"触发T-Bot失败 - 用户: {screen_name}")
-
         total_new += new_count
+        staged_users.append(screen_name)
         logger.info(f"✅ 处理完成\n{'=' * 40}\n")
 
+        # 达到批次阈值时提前触发下游流程，限制推送延迟
+        if 0 < EnvConfig.TBOT_FLUSH_EVERY <= len(staged_users):
+            flush_tbot(staged_users)
+            staged_users = []
+
+    shutdown_xbot()
+
+    # 触发下游流程 (剩余批次)
+    if staged_users:
+        flush_tbot(staged_users)
+
     # 最终状态汇总
     summary_msg = f"🎉 所有用户处理完成！总新增条目: {total_new}"
     logger.info(summary_msg)
@@ -542,4 +506,6 @@ if __name__ == "__main__":
                 lark_notifier.send_text(error_msg, is_alert=True)
         except:
             logger.error("无法发送错误通知", exc_info=True)
+    finally:
+        logger.info(f"📊 运行指标已写入: {metrics.write_report('INI-XT-Bot', str(PathConfig.LOG_DIR))}")
 
@@ -1,11 +1,26 @@
 import sys
 import json
 import os
+import copy
+import asyncio
+import hashlib
+import heapq
+import itertools
+import shutil
+import time
+import uuid
 import requests
 import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, Dict, Any, List
+from urllib.parse import urlparse
+
+import metrics
 
 
 # --------------------------
@@ -20,6 +35,7 @@ class Config:
     DEFAULT_DOWNLOAD_DIR = "../downloads"
     DEFAULT_OUTPUT_DIR = "../output"
     DEFAULT_LOG_DIR = "../logs/"  # 默认日志目录
+    DEFAULT_CACHE_DIR = os.getenv('DOWNLOAD_CACHE_DIR', "../cache")  # 下载内容缓存目录
 
     # Telegram配置 (保持原始限制)
     TELEGRAM_LIMITS = {
@@ -32,6 +48,60 @@ class Config:
     MAX_DOWNLOAD_ATTEMPTS = 10  # 保持原始重试次数
     NOTIFICATION_TRUNCATE = 200  # 通知消息截断长度
 
+    # 并发下载
+    DOWNLOAD_WORKERS = int(os.getenv('DOWNLOAD_WORKERS', '4'))  # 并发下载线程数(1为串行)
+    MAX_CONNECTIONS_PER_HOST = int(os.getenv('MAX_CONNECTIONS_PER_HOST', '2'))  # 单主机最大并发连接数
+
+    # HTTP连接池
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))  # 缓存的主机连接池数量
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', str(max(10, DOWNLOAD_WORKERS))))  # 单主机连接池容量
+    HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '2'))  # 连接错误/5xx的传输层重试次数
+    HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5'))  # 重试退避系数(秒)
+
+    # 异步流水线 (--async)
+    ASYNC_MAX_CONCURRENCY = int(os.getenv('ASYNC_MAX_CONCURRENCY', '8'))  # 下载+上传总并发上限
+    ASYNC_QUEUE_SIZE = int(os.getenv('ASYNC_QUEUE_SIZE', '16'))  # 阶段间有界队列容量
+    ASYNC_UPLOAD_WORKERS = int(os.getenv('ASYNC_UPLOAD_WORKERS', '1'))  # 上传阶段协程数
+
+    # 媒体源地址 (设置后媒体URL的协议与主机替换为该地址、保留路径，用于指向本地模拟CDN)
+    MEDIA_BASE_URL = os.getenv('MEDIA_BASE_URL', '').rstrip('/')
+
+    # 视频下载前大小预检 (HEAD请求Content-Length对比TELEGRAM_LIMITS；图片远小于上限，仅在下载响应头中校验)
+    DOWNLOAD_PREFLIGHT = os.getenv('DOWNLOAD_PREFLIGHT', '1') != '0'
+    PREFLIGHT_TIMEOUT = 10  # 预检请求超时(秒)
+
+    # 断点续传
+    DOWNLOAD_RESUME_RETRIES = int(os.getenv('DOWNLOAD_RESUME_RETRIES', '3'))  # 单次下载内连接中断后的续传次数
+    DOWNLOAD_CHUNK_MIN = 8 * 1024  # 读取块下限
+    DOWNLOAD_CHUNK_MAX = 1024 * 1024  # 读取块上限
+
+    # 下载缓存 (按URL与内容哈希去重)
+    CACHE_ENABLED = os.getenv('DOWNLOAD_CACHE_ENABLED', '1') != '0'
+    CACHE_MAX_BYTES = int(os.getenv('DOWNLOAD_CACHE_MAX_MB', '2048')) * 1024 * 1024  # 缓存容量上限，超出按LRU淘汰
+
+    # 飞书开放平台 (可指向本地模拟服务)
+    LARK_API_BASE = os.getenv('LARK_API_BASE', 'https://open.feishu.cn').rstrip('/')
+    LARK_UPLOAD_TIMEOUT = 60  # 图片/文件上传超时(秒)
+    LARK_UPLOAD_LIMITS = {
+        'image': 10 * 1024 * 1024,  # 图片上传接口上限10MB
+        'file': 30 * 1024 * 1024  # 文件上传接口上限30MB (低于TELEGRAM_LIMITS的视频上限)
+    }
+    LARK_TOKEN_REFRESH_AHEAD = int(os.getenv('LARK_TOKEN_REFRESH_AHEAD', '600'))  # 过期前N秒起后台刷新令牌
+    LARK_TOKEN_REFRESH_AHEAD_RATIO = 0.5  # 提前刷新时间不超过令牌有效期的该比例
+    LARK_TOKEN_REFRESH_MIN_DELAY = 30  # 后台刷新最短间隔(秒)，避免对令牌接口密集请求
+    LARK_TOKEN_EXPIRY_MARGIN = 60  # 令牌剩余有效期低于该值(秒)时视为已过期
+    LARK_TOKEN_CACHE_FILE = os.getenv('LARK_TOKEN_CACHE_FILE', '')  # 令牌持久化文件(权限0600)，为空则不落盘
+
+    # 飞书发送调度 (自定义机器人限频约 100次/分钟、5次/秒)
+    LARK_RATE_PER_MIN = float(os.getenv('LARK_RATE_PER_MIN', '100'))  # 令牌桶补充速率
+    LARK_BURST = int(os.getenv('LARK_BURST', '5'))  # 令牌桶容量(允许的突发条数)
+    LARK_BACKOFF_BASE = 1.0  # 限流退避初始等待(秒)，连续限流时翻倍
+    LARK_BACKOFF_MAX = 60.0  # 限流退避等待上限(秒)
+    LARK_MAX_RETRIES = int(os.getenv('LARK_MAX_RETRIES', '5'))  # 单条消息被限流后的最大重发次数
+
+    # 状态日志
+    JOURNAL_COMPACT_INTERVAL = int(os.getenv('JOURNAL_COMPACT_INTERVAL', '50'))  # 每N条状态变更压实一次(0为仅结束时)
+
     @classmethod
     def get_env_vars(cls) -> Dict[str, str]:
         """环境变量获取 (保持原始变量名)"""
@@ -40,7 +110,8 @@ class Config:
             'chat_id': os.getenv('CHAT_ID'),
             'lark_key': os.getenv('LARK_KEY'),
             'lark_app_id': os.getenv('LARK_APP_ID'),
-            'lark_app_secret': os.getenv('LARK_APP_SECRET')
+            'lark_app_secret': os.getenv('LARK_APP_SECRET'),
+            'lark_chat_id': os.getenv('LARK_CHAT_ID')  # 可选：文件消息需经应用接口发送到该群
         }
 
 
@@ -97,6 +168,83 @@ def configure_logging():
 logger = configure_logging()
 
 
+# --------------------------
+# HTTP会话模块
+# --------------------------
+class HttpClient:
+    """共享HTTP会话 (连接池 + keep-alive + 重试退避)，T-Bot所有网络请求均经由此处"""
+
+    _session: Optional[requests.Session] = None
+    _adapter: Optional[HTTPAdapter] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def session(cls) -> requests.Session:
+        """获取进程内共享会话 (首次调用时创建)"""
+        with cls._lock:
+            if cls._session is None:
+                cls._session, cls._adapter = cls._build_session()
+        return cls._session
+
+    @staticmethod
+    def _build_session():
+        """构建带连接池与重试策略的会话"""
+        retry = Retry(
+            total=Config.HTTP_RETRIES,
+            backoff_factor=Config.HTTP_BACKOFF_FACTOR,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),  # POST不自动重试，避免重复推送
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=Config.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+            max_retries=retry
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session, adapter
+
+    @classmethod
+    def get(cls, url: str, **kwargs) -> requests.Response:
+        return cls.session().get(url, **kwargs)
+
+    @classmethod
+    def head(cls, url: str, **kwargs) -> requests.Response:
+        return cls.session().head(url, **kwargs)
+
+    @classmethod
+    def post(cls, url: str, **kwargs) -> requests.Response:
+        return cls.session().post(url, **kwargs)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, int]]:
+        """按主机统计请求数、新建连接数与复用次数"""
+        if cls._adapter is None:
+            return {}
+        pools = cls._adapter.poolmanager.pools
+        result = {}
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{key.key_host}:{key.key_port}" if key.key_port else key.key_host
+            stat = result.setdefault(host, {"requests": 0, "connections": 0, "reused": 0})
+            stat["requests"] += pool.num_requests
+            stat["connections"] += pool.num_connections
+            stat["reused"] += max(0, pool.num_requests - pool.num_connections)
+        return result
+
+    @classmethod
+    def log_stats(cls) -> None:
+        """输出连接复用统计"""
+        for host, stat in cls.stats().items():
+            logger.info(
+                f"🔌 连接统计 {host}: 请求 {stat['requests']} | 新建连接 {stat['connections']} | 复用 {stat['reused']}"
+            )
+
+
 # --------------------------
 # 通知模块 (保持原始飞书逻辑)
 # --------------------------
@@ -110,14 +258,15 @@ class Notifier:
         if not lark_key:
             return False
 
-        webhook_url = f"https://open.feishu.cn/open-apis/bot/v2/hook/{lark_key}"
+        webhook_url = f"{Config.LARK_API_BASE}/open-apis/bot/v2/hook/{lark_key}"
         try:
             payload = {
                 "msg_type": "text",
                 "content": {"text": f"📢 动态更新\n{message}"}  # 自定义友好前缀
             }
-            response = requests.post(webhook_url, json=payload, timeout=10)
-            response.raise_for_status()
+            success, detail = LarkDispatcher.for_webhook(webhook_url).send(payload)
+            if not success:
+                raise RuntimeError(detail)
             logger.info("📨 飞书动态消息发送成功")
             return True
         except Exception as e:
@@ -133,15 +282,18 @@ class Notifier:
         # 保持原始消息截断
         truncated_msg = f"{message[:Config.NOTIFICATION_TRUNCATE]}..." if len(
             message) > Config.NOTIFICATION_TRUNCATE else message
-        webhook_url = f"https://open.feishu.cn/open-apis/bot/v2/hook/{Config.get_env_vars()['lark_key']}"
+        webhook_url = f"{Config.LARK_API_BASE}/open-apis/bot/v2/hook/{Config.get_env_vars()['lark_key']}"
 
         try:
             payload = {
                 "msg_type": "text",
                 "content": {"text": f"📢 XT-Bot处理告警\n{truncated_msg}"}
             }
-            response = requests.post(webhook_url, json=payload, timeout=10)
-            response.raise_for_status()
+            success, detail = LarkDispatcher.for_webhook(webhook_url).send(
+                payload, LarkDispatcher.PRIORITY_ALERT
+            )
+            if not success:
+                raise RuntimeError(detail)
             logger.info("📨 飞书通知发送成功")
             return True
         except Exception as e:
@@ -149,29 +301,414 @@ class Notifier:
             return False
 
 
+# --------------------------
+# 飞书发送调度
+# --------------------------
+class LarkDispatcher:
+    """飞书Webhook发送调度器 (每个Webhook一个后台发送线程)
+
+    - 令牌桶限速，突发消息排队等待而非直接被飞书拒绝
+    - 遇到429或频控错误码时按 Retry-After 或指数退避暂停，并将消息重新入队
+    - 优先级队列：告警先于内容消息发送
+    """
+
+    PRIORITY_ALERT = 0
+    PRIORITY_CONTENT = 1
+    RATE_LIMIT_CODES = {9499, 11232}  # 飞书频控错误码
+
+    _instances: Dict[str, 'LarkDispatcher'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, webhook_url: str):
+        self.webhook_url = webhook_url
+        self._queue: List[tuple] = []  # (优先级, 序号, 消息)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._rate = max(Config.LARK_RATE_PER_MIN, 1) / 60
+        self._capacity = max(1, Config.LARK_BURST)
+        self._tokens = float(self._capacity)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._backoff = 0.0
+
+    @classmethod
+    def for_webhook(cls, webhook_url: str) -> 'LarkDispatcher':
+        """获取Webhook对应的进程内共享调度器"""
+        with cls._instances_lock:
+            dispatcher = cls._instances.get(webhook_url)
+            if dispatcher is None:
+                dispatcher = cls._instances[webhook_url] = cls(webhook_url)
+        return dispatcher
+
+    def submit(self, payload: Dict[str, Any], priority: int = PRIORITY_CONTENT) -> Future:
+        """消息入队，返回结果为 (是否成功, 消息) 的Future"""
+        message = {"payload": payload, "future": Future(), "retries": 0}
+        with self._cond:
+            heapq.heappush(self._queue, (priority, next(self._seq), message))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="lark-dispatcher", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        return message["future"]
+
+    def send(self, payload: Dict[str, Any], priority: int = PRIORITY_CONTENT) -> tuple:
+        """入队并阻塞等待发送结果"""
+        return self.submit(payload, priority).result()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+            # 先等待令牌再出队，等待期间到达的告警可以插队
+            self._acquire_token()
+            with self._cond:
+                priority, _, message = heapq.heappop(self._queue)
+            self._deliver(priority, message)
+
+    def _acquire_token(self) -> None:
+        """令牌桶取令牌 (限流暂停期间一并等待)"""
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._refilled_at) * self._rate)
+                self._refilled_at = now
+                wait = self._paused_until - now
+                if wait <= 0 and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                if wait <= 0:
+                    wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
+    def _deliver(self, priority: int, message: Dict[str, Any]) -> None:
+        """发送一条消息，并将结果回填给其Future"""
+        try:
+            response = HttpClient.post(self.webhook_url, json=message["payload"], timeout=10)
+            if response.status_code == 429:
+                self._handle_rate_limit(priority, message, response)
+                return
+            response.raise_for_status()
+
+            # 处理响应
+            result = response.json()
+            if result.get("code") in self.RATE_LIMIT_CODES:
+                self._handle_rate_limit(priority, message, response)
+                return
+
+            self._backoff = 0.0
+            if result.get("code") == 0:
+                logger.info("✅ 飞书消息发送成功")
+                outcome = (True, result.get("message", ""))
+            else:
+                logger.error(f"❌ 飞书响应错误: {result}")
+                outcome = (False, result.get("msg", "未知错误"))
+        except Exception as e:
+            logger.error(f"🚨 飞书消息发送失败: {str(e)}", exc_info=True)
+            outcome = (False, str(e))
+
+        message["future"].set_result(outcome)
+
+    def _handle_rate_limit(self, priority: int, message: Dict[str, Any],
+                           response: requests.Response) -> None:
+        """被限流：暂停发送并将消息重新入队 (超出重发次数的直接返回失败)"""
+        self._backoff = min(max(self._backoff * 2, Config.LARK_BACKOFF_BASE), Config.LARK_BACKOFF_MAX)
+        wait = self._backoff
+        for header in ('Retry-After', 'x-ogw-ratelimit-reset'):
+            value = response.headers.get(header, '')
+            if value.isdigit():
+                wait = max(wait, float(value))
+                break
+        logger.warning(f"⏳ 飞书限流，暂停发送 {wait:.1f} 秒")
+
+        with self._cond:
+            self._paused_until = time.monotonic() + wait
+            message["retries"] += 1
+            if message["retries"] > Config.LARK_MAX_RETRIES:
+                message["future"].set_result((False, "飞书限流，重试次数已用尽"))
+            else:
+                heapq.heappush(self._queue, (priority, next(self._seq), message))
+
+
+# --------------------------
+# 飞书上传辅助
+# --------------------------
+class MultipartBody:
+    """流式 multipart/form-data 请求体：文件内容按块读取，不整体载入内存
+
+    同时提供 __len__ (用于Content-Length)、__iter__ 与 read()，可直接作为 requests 的 data 参数。
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, fields: Dict[str, str], file_field: str, file_path: Path):
+        self.file_path = Path(file_path)
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+
+        head = b"".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8')
+            for name, value in fields.items()
+        )
+        head += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+            f'filename="{self.file_path.name}"\r\nContent-Type: application/octet-stream\r\n\r\n'
+        ).encode('utf-8')
+        self._head = head
+        self._tail = f"\r\n--{boundary}--\r\n".encode('utf-8')
+        self._length = len(head) + self.file_path.stat().st_size + len(self._tail)
+        self._chunks = None
+        self._buffer = b""
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self):
+        yield self._head
+        with self.file_path.open('rb') as f:
+            for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b''):
+                yield chunk
+        yield self._tail
+
+    def read(self, size: int = -1) -> bytes:
+        if self._chunks is None:
+            self._chunks = iter(self)
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class LarkResourceCache:
+    """已上传资源缓存：内容哈希 -> image_key/file_key，相同媒体不重复上传"""
+
+    _lock = threading.Lock()
+    _entries: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def _path(cls) -> Path:
+        return Path(Config.DEFAULT_CACHE_DIR) / "lark_resources.json"
+
+    @classmethod
+    def _load(cls) -> Dict[str, str]:
+        """加载缓存 (调用方持有锁)"""
+        if cls._entries is None:
+            try:
+                with cls._path().open('r', encoding='utf-8') as f:
+                    cls._entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                cls._entries = {}
+        return cls._entries
+
+    @classmethod
+    def get(cls, key: str) -> Optional[str]:
+        with cls._lock:
+            return cls._load().get(key)
+
+    @classmethod
+    def put(cls, key: str, resource_key: str) -> None:
+        """登记并原子写入缓存文件"""
+        with cls._lock:
+            entries = cls._load()
+            entries[key] = resource_key
+            path = cls._path()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.tmp")
+            with tmp_path.open('w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, path)
+
+    @staticmethod
+    def content_key(file_path: Path, kind: str, app_id: Optional[str]) -> str:
+        """缓存键：应用ID + 资源类型 + 文件内容sha256 (资源key仅在所属应用内有效)"""
+        sha = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(block)
+        return f"{app_id}:{kind}:{sha.hexdigest()}"
+
+
+class TenantTokenCache:
+    """进程内共享的 tenant_access_token 缓存 (每个应用一个实例)
+
+    - 并发获取时只有一个线程请求新令牌，其余线程等待其结果
+    - 距过期不足 LARK_TOKEN_REFRESH_AHEAD 秒时由后台定时器提前刷新，调用方继续使用旧令牌
+    - 配置 LARK_TOKEN_CACHE_FILE 时落盘(0600)，短生命周期的运行可直接复用未过期令牌
+    """
+
+    _instances: Dict[tuple, 'TenantTokenCache'] = {}
+    _instances_lock = threading.Lock()
+    _file_lock = threading.Lock()
+
+    def __init__(self, app_id: str, app_secret: str):
+        self.app_id = app_id
+        self.app_secret = app_secret
+        self._cache_key = f"{Config.LARK_API_BASE}|{app_id}"
+        self._cond = threading.Condition()
+        self._token: Optional[str] = None
+        self._expires_at = 0.0  # 过期时间(epoch秒)
+        self._lifetime = 0.0  # 令牌有效期(秒)
+        self._refreshing = False
+        self._last_error: Optional[Exception] = None
+        self._timer: Optional[threading.Timer] = None
+        self._load_persisted()
+
+    @classmethod
+    def for_app(cls, app_id: str, app_secret: str) -> 'TenantTokenCache':
+        """获取应用对应的共享缓存"""
+        key = (Config.LARK_API_BASE, app_id)
+        with cls._instances_lock:
+            cache = cls._instances.get(key)
+            if cache is None:
+                cache = cls._instances[key] = cls(app_id, app_secret)
+        return cache
+
+    def token(self) -> str:
+        """返回有效令牌，必要时刷新 (并发调用合并为一次请求)"""
+        with self._cond:
+            if self._is_valid():
+                return self._token
+            if self._refreshing:
+                self._cond.wait_for(lambda: not self._refreshing)
+                if self._is_valid():
+                    return self._token
+                raise RuntimeError(f"获取tenant_access_token失败: {self._last_error}")
+            self._refreshing = True
+        return self._refresh()
+
+    def _is_valid(self) -> bool:
+        """令牌存在且未临近过期 (调用方持有锁)"""
+        return bool(self._token) and time.time() < self._expires_at - Config.LARK_TOKEN_EXPIRY_MARGIN
+
+    def _refresh(self) -> str:
+        """请求新令牌 (调用方已将 _refreshing 置为True)"""
+        try:
+            response = HttpClient.post(
+                f"{Config.LARK_API_BASE}/open-apis/auth/v3/tenant_access_token/internal",
+                json={"app_id": self.app_id, "app_secret": self.app_secret},
+                timeout=10
+            )
+            response.raise_for_status()
+            result = response.json()
+            if result.get("code") != 0:
+                raise RuntimeError(f"飞书接口错误 {result.get('code')}: {result.get('msg')}")
+        except Exception as e:
+            with self._cond:
+                self._refreshing = False
+                self._last_error = e
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self._token = result["tenant_access_token"]
+            self._lifetime = float(result.get("expire", 7200))
+            self._expires_at = time.time() + self._lifetime
+            self._refreshing = False
+            self._last_error = None
+            self._cond.notify_all()
+            token = self._token
+        logger.info("🔑 已获取飞书tenant_access_token")
+
+        self._persist()
+        self._schedule_refresh()
+        return token
+
+    def _schedule_refresh(self) -> None:
+        """在过期前 LARK_TOKEN_REFRESH_AHEAD 秒安排后台刷新 (提前量按有效期比例封顶，间隔不低于下限)"""
+        ahead = min(Config.LARK_TOKEN_REFRESH_AHEAD, self._lifetime * Config.LARK_TOKEN_REFRESH_AHEAD_RATIO)
+        delay = max(self._expires_at - ahead - time.time(), Config.LARK_TOKEN_REFRESH_MIN_DELAY)
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self) -> None:
+        with self._cond:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        try:
+            self._refresh()
+        except Exception as e:
+            # 旧令牌仍可用，过期后由调用方同步刷新
+            logger.warning(f"⚠️ 后台刷新tenant_access_token失败: {str(e)}")
+
+    def _load_persisted(self) -> None:
+        """读取落盘的未过期令牌"""
+        entry = self._read_cache_file().get(self._cache_key)
+        if entry and time.time() < entry.get("expires_at", 0) - Config.LARK_TOKEN_EXPIRY_MARGIN:
+            self._token = entry["token"]
+            self._expires_at = entry["expires_at"]
+            self._lifetime = entry.get("lifetime", self._expires_at - time.time())
+            self._schedule_refresh()
+            logger.info("🔑 复用已缓存的飞书tenant_access_token")
+
+    def _persist(self) -> None:
+        """将令牌写入缓存文件 (仅所有者可读写)"""
+        if not Config.LARK_TOKEN_CACHE_FILE:
+            return
+        path = Path(Config.LARK_TOKEN_CACHE_FILE)
+        with self._file_lock:
+            entries = self._read_cache_file()
+            entries[self._cache_key] = {
+                "token": self._token, "expires_at": self._expires_at, "lifetime": self._lifetime
+            }
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.chmod(tmp_path, 0o600)  # 已存在的临时文件不受os.open权限参数影响
+            os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_cache_file() -> Dict[str, Any]:
+        if not Config.LARK_TOKEN_CACHE_FILE:
+            return {}
+        try:
+            with open(Config.LARK_TOKEN_CACHE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+
 # --------------------------
 # 飞书通知服务
 # --------------------------
 class LarkNotifier:
     """飞书通知服务"""
     
-    def __init__(self, lark_key, app_id=None, app_secret=None):
-        self.webhook_url = f"https://open.feishu.cn/open-apis/bot/v2/hook/{lark_key}"
+    # 飞书上传接口要求的文件类型
+    FILE_TYPES = {'.mp4': 'mp4', '.opus': 'opus', '.pdf': 'pdf', '.doc': 'doc', '.docx': 'doc',
+                  '.xls': 'xls', '.xlsx': 'xls', '.ppt': 'ppt', '.pptx': 'ppt'}
+
+    def __init__(self, lark_key, app_id=None, app_secret=None, chat_id=None):
+        self.webhook_url = f"{Config.LARK_API_BASE}/open-apis/bot/v2/hook/{lark_key}"
         self.app_id = app_id
         self.app_secret = app_secret
-        self.access_token = None
+        self.chat_id = chat_id
+        self.dispatcher = LarkDispatcher.for_webhook(self.webhook_url)
         
     def send_text(self, content, is_alert=False):
-        """发送文本消息"""
+        """发送文本消息 (告警优先发送)"""
         prefix = "🔔 告警通知\n" if is_alert else "📢 动态更新\n"
         payload = {
             "msg_type": "text",
             "content": {"text": f"{prefix}{content}"}
         }
-        return self._send_request(payload)
+        priority = LarkDispatcher.PRIORITY_ALERT if is_alert else LarkDispatcher.PRIORITY_CONTENT
+        return self._send_request(payload, priority)
     
-    def send_rich_text(self, title, content, screen_name=None, publish_time=None):
-        """发送富文本消息"""
+    def send_rich_text(self, title, content, screen_name=None, publish_time=None, image_key=None):
+        """发送富文本消息 (可附带已上传图片)"""
         # 构建zh_cn语言的内容
         zh_cn_content = []
         
@@ -199,6 +736,10 @@ class LarkNotifier:
         # 添加主要内容
         if content:
             zh_cn_content.append([{"tag": "text", "text": content}])
+
+        # 添加图片
+        if image_key:
+            zh_cn_content.append([{"tag": "img", "image_key": image_key}])
         
         payload = {
             "msg_type": "post",
@@ -213,28 +754,10 @@ class LarkNotifier:
         }
         return self._send_request(payload)
     
-    def _send_request(self, payload):
-        """发送请求到飞书"""
-        try:
-            response = requests.post(
-                self.webhook_url, 
-                json=payload, 
-                timeout=10
-            )
-            response.raise_for_status()
-            
-            # 处理响应
-            result = response.json()
-            if result.get("code") == 0:
-                logger.info("✅ 飞书消息发送成功")
-                return True, result.get("message", "")
-            else:
-                logger.error(f"❌ 飞书响应错误: {result}")
-                return False, result.get("msg", "未知错误")
-                
-        except Exception as e:
-            logger.error(f"🚨 飞书消息发送失败: {str(e)}", exc_info=True)
-            return False, str(e)
+    @metrics.timed("tbot.lark_send")
+    def _send_request(self, payload, priority=LarkDispatcher.PRIORITY_CONTENT):
+        """经调度器发送请求到飞书，返回 (是否成功, 消息)"""
+        return self.dispatcher.send(payload, priority)
 
     def upload_media_to_lark(self, file_path, item):
         """上传媒体文件到飞书"""
@@ -245,7 +768,14 @@ class LarkNotifier:
         screen_name = item['user']['screen_name']
         publish_time = datetime.fromisoformat(item['publish_time']).strftime("%Y-%m-%d %H:%M:%S")
         text_content = item.get('full_text', '')
-        
+
+        # 未配置应用凭证时无法调用上传接口，经Webhook发送附带媒体链接的富文本
+        if file_type in ['image', 'video', 'audio', 'file'] and not self.can_upload:
+            return self._send_media_link(item['url'], screen_name, publish_time, text_content, file_type)
+
+        # 超出飞书上传上限时抛出 FileTooLargeError，由上传模块按 file_too_large 处理
+        self._check_upload_size(file_path, 'image' if file_type == 'image' else 'file')
+
         # 如果是图片，直接发送图片消息
         if file_type == 'image':
             return self._send_image(file_path, screen_name, publish_time, text_content)
@@ -262,6 +792,31 @@ class LarkNotifier:
                 publish_time=publish_time
             )
 
+    @property
+    def can_upload(self):
+        """是否配置了调用上传接口所需的应用凭证"""
+        return bool(self.app_id and self.app_secret)
+
+    def _send_media_link(self, url, screen_name, publish_time, text_content, file_type):
+        """以富文本发送正文与媒体原始链接 (未配置应用凭证时的Webhook投递方式)"""
+        success, message = self.send_rich_text(
+            title=f"#{screen_name}" if file_type == 'image' else f"#{screen_name} #{file_type}",
+            content=f"{text_content}\n{url}" if text_content else url,
+            screen_name=screen_name,
+            publish_time=publish_time
+        )
+        return (True, f"lark_message_{datetime.now().timestamp()}") if success else (False, message)
+
+    @staticmethod
+    def _check_upload_size(file_path, kind):
+        """文件大小超出飞书上传接口限制时抛出 FileTooLargeError"""
+        size = os.path.getsize(file_path)
+        limit = Config.LARK_UPLOAD_LIMITS[kind]
+        if size > limit:
+            raise FileTooLargeError(
+                f"文件大小 {size / 1024 / 1024:.2f}MB 超过飞书{kind}上传限制 {limit // 1024 // 1024}MB"
+            )
+
     def _detect_file_type(self, file_path):
         """判断文件类型"""
         file_path = str(file_path).lower()
@@ -275,27 +830,124 @@ class LarkNotifier:
             return 'file'
 
     def _send_image(self, file_path, screen_name, publish_time, text_content):
-        """发送图片消息到飞书"""
-        # 简化实现，实际应该调用飞书API上传图片
-        logger.info(f"模拟图片上传: {file_path}")
-        return True, f"image_{datetime.now().timestamp()}"
+        """上传图片获取image_key，再以附带图片的富文本消息发送"""
+        try:
+            image_key = self._upload_resource(file_path, 'image')
+        except Exception as e:
+            logger.error(f"✗ 飞书图片上传失败: {str(e)}")
+            return False, str(e)
+
+        success, message = self.send_rich_text(
+            title=f"#{screen_name}",
+            content=text_content,
+            screen_name=screen_name,
+            publish_time=publish_time,
+            image_key=image_key
+        )
+        return (True, image_key) if success else (False, message)
 
     def _share_file(self, file_path, screen_name, publish_time, text_content, file_type):
-        """共享文件到飞书"""
-        # 简化实现，实际应该调用飞书API上传文件
-        logger.info(f"模拟{file_type}文件上传: {file_path}")
-        return True, f"file_{datetime.now().timestamp()}"
+        """上传文件获取file_key，经应用接口发送文件消息，并以富文本附带说明"""
+        try:
+            file_key = self._upload_resource(file_path, 'file')
+            if self.chat_id:
+                self._send_app_message("file", {"file_key": file_key})
+            else:
+                # 自定义机器人Webhook不支持文件消息
+                logger.warning("⚠️ 未配置LARK_CHAT_ID，文件已上传但仅发送文字说明")
+        except Exception as e:
+            logger.error(f"✗ 飞书{file_type}文件上传失败: {str(e)}")
+            return False, str(e)
+
+        success, message = self.send_rich_text(
+            title=f"#{screen_name} #{file_type}",
+            content=text_content,
+            screen_name=screen_name,
+            publish_time=publish_time
+        )
+        return (True, file_key) if success else (False, message)
+
+    def _upload_resource(self, file_path, kind):
+        """流式上传图片(kind='image')或文件(kind='file')，返回image_key/file_key (按内容哈希缓存)"""
+        file_path = Path(file_path)
+        cache_key = LarkResourceCache.content_key(file_path, kind, self.app_id)
+        cached = LarkResourceCache.get(cache_key)
+        if cached:
+            logger.info(f"📦 复用已上传资源: {file_path.name}")
+            return cached
+
+        if kind == 'image':
+            url = f"{Config.LARK_API_BASE}/open-apis/im/v1/images"
+            body = MultipartBody({"image_type": "message"}, "image", file_path)
+        else:
+            url = f"{Config.LARK_API_BASE}/open-apis/im/v1/files"
+            file_type = self.FILE_TYPES.get(file_path.suffix.lower(), 'stream')
+            body = MultipartBody({"file_type": file_type, "file_name": file_path.name}, "file", file_path)
+
+        response = HttpClient.post(
+            url,
+            data=body,
+            headers={"Authorization": f"Bearer {self._get_tenant_token()}", "Content-Type": body.content_type},
+            timeout=Config.LARK_UPLOAD_TIMEOUT
+        )
+        result = self._parse_api_response(response)
+        resource_key = result["data"][f"{kind}_key"]
+        LarkResourceCache.put(cache_key, resource_key)
+        logger.info(f"⏫ 飞书{kind}上传成功: {file_path.name} ({len(body) // 1024}KB)")
+        return resource_key
+
+    def _send_app_message(self, msg_type, content):
+        """经应用接口向 LARK_CHAT_ID 发送消息，返回message_id"""
+        response = HttpClient.post(
+            f"{Config.LARK_API_BASE}/open-apis/im/v1/messages",
+            params={"receive_id_type": "chat_id"},
+            json={"receive_id": self.chat_id, "msg_type": msg_type, "content": json.dumps(content)},
+            headers={"Authorization": f"Bearer {self._get_tenant_token()}"},
+            timeout=10
+        )
+        return self._parse_api_response(response).get("data", {}).get("message_id")
+
+    def _get_tenant_token(self):
+        """获取tenant_access_token (进程内共享，临近过期时后台刷新)"""
+        if not (self.app_id and self.app_secret):
+            raise RuntimeError("上传文件需要配置 LARK_APP_ID 与 LARK_APP_SECRET")
+        return TenantTokenCache.for_app(self.app_id, self.app_secret).token()
+
+    @staticmethod
+    def _parse_api_response(response):
+        """校验开放平台响应，失败时抛出异常"""
+        response.raise_for_status()
+        result = response.json()
+        if result.get("code") != 0:
+            raise RuntimeError(f"飞书接口错误 {result.get('code')}: {result.get('msg')}")
+        return result
 
 
 # --------------------------
 # 文件处理模块 (保持原始JSON操作)
 # --------------------------
 class FileProcessor:
-    """文件处理器 (保持原始JSON r+模式)"""
+    """文件处理器 (JSON读写 + 状态预写日志)
+
+    处理过程中每条记录的状态变化追加写入 <文件名>.journal 预写日志，
+    启动时回放日志，并按 JOURNAL_COMPACT_INTERVAL 定期压实回主JSON。
+    每次写入主JSON时同步生成 <文件名>.pending 索引，记录仍待处理的条目下标
+    及主文件指纹，供后续运行只处理待办条目或直接跳过整个文件。
+    """
+
+    STATE_FIELDS = ('is_downloaded', 'download_info', 'is_uploaded', 'upload_info')
 
     def __init__(self, json_path: str, download_dir: str):
         self.json_path = Path(json_path)
         self.download_path = Path(download_dir)
+        self.journal_path = self.json_path.with_name(f"{self.json_path.name}.journal")
+        self.pending_path = self.pending_index_path(self.json_path)
+        self._pending_indices: Optional[List[int]] = None  # 有效的待办索引 (无效时为None)
+        self._journal_lock = threading.Lock()
+        self._journal_file = None
+        self._journal_records = 0  # 自上次压实以来的日志条数
+        self._snapshot: List[Dict[str, Any]] = []  # 仅在锁内更新的数据副本，用于压实
+        self._positions: Dict[int, int] = {}  # id(item) -> 下标
         self._ensure_dirs()
 
     def _ensure_dirs(self) -> None:
@@ -303,28 +955,337 @@ class FileProcessor:
         self.download_path.mkdir(parents=True, exist_ok=True)
         logger.info(f"📂 下载目录已就绪: {self.download_path}")
 
+    @metrics.timed("tbot.load_data")
     def load_data(self) -> List[Dict[str, Any]]:
-        """加载JSON数据 (保持原始r+模式)"""
+        """加载JSON数据并回放未压实的状态日志"""
         try:
-            with self.json_path.open('r+', encoding='utf-8') as f:
-                data = json.load(f)
-                logger.info(f"📄 已加载JSON数据，共{len(data)}条记录")
-                return data
+            raw = self.json_path.read_bytes()
+            data = json.loads(raw.decode('utf-8'))
+            logger.info(f"📄 已加载JSON数据，共{len(data)}条记录")
         except Exception as e:
             logger.error(f"✗ JSON文件加载失败: {str(e)}")
             raise
 
+        # 存在未回放的日志时状态已变化，待办索引不可信
+        if not self.journal_path.exists():
+            self._pending_indices = self._load_pending_indices(raw)
+        self._replay_journal(data)
+        self._snapshot = copy.deepcopy(data)
+        self._positions = {id(item): i for i, item in enumerate(data)}
+        return data
+
+    @metrics.timed("tbot.save_data")
     def save_data(self, data: List[Dict[str, Any]]) -> None:
-        """保存JSON数据 (保持原始截断方式)"""
+        """保存JSON数据并清空状态日志 (临时文件+重命名，中断时不损坏原文件)"""
         try:
-            with self.json_path.open('r+', encoding='utf-8') as f:
-                f.seek(0)
-                json.dump(data, f, indent=2, ensure_ascii=False)
-                f.truncate()
+            with self._journal_lock:
+                self._write_json(data)
+                self._reset_journal(remove=True)
         except Exception as e:
             logger.error(f"✗ JSON保存失败: {str(e)}")
             raise
 
+    def record(self, item: Dict[str, Any]) -> None:
+        """追加单条记录的最新状态到预写日志 (下载/上传完成后调用)"""
+        index = self._positions.get(id(item))
+        if index is None:
+            return
+        # 在处理该条目的线程内序列化，避免与其他线程的修改交错
+        state = {field: copy.deepcopy(item.get(field)) for field in self.STATE_FIELDS if field in item}
+        line = json.dumps({"index": index, "key": self.item_key(item), "state": state}, ensure_ascii=False)
+
+        with self._journal_lock:
+            if self._journal_file is None:
+                self._journal_file = self.journal_path.open('a', encoding='utf-8')
+            self._journal_file.write(line + "\n")
+            self._journal_file.flush()
+            self._snapshot[index].update(state)
+            self._journal_records += 1
+
+            if 0 < Config.JOURNAL_COMPACT_INTERVAL <= self._journal_records:
+                self._write_json(self._snapshot)
+                self._reset_journal(remove=False)
+                logger.info(f"🗜 状态日志已压实: {self.json_path.name}")
+
+    def pending_items(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """返回仍需处理的条目 (待办索引有效时直接取用，否则全量扫描)"""
+        if self._pending_indices is not None:
+            items = [data[i] for i in self._pending_indices if i < len(data)]
+            logger.info(f"📑 待办索引命中: {len(items)}/{len(data)} 条待处理")
+        else:
+            items = [item for item in data if self.is_pending(item)]
+            logger.info(f"📑 全量扫描: {len(items)}/{len(data)} 条待处理")
+        return items
+
+    @staticmethod
+    def is_pending(item: Dict[str, Any]) -> bool:
+        """是否仍有待处理工作 (待下载/待上传/可恢复错误/未发送的不可恢复告警)"""
+        if item.get('is_uploaded'):
+            return False
+        upload_info = item.get('upload_info', {})
+        if upload_info.get('error_type') in ['file_too_large', 'max_download_attempts']:
+            return not upload_info.get('notification_sent')
+        return True
+
+    @staticmethod
+    def pending_index_path(json_path) -> Path:
+        """待办索引文件路径"""
+        json_path = Path(json_path)
+        return json_path.with_name(f"{json_path.name}.pending")
+
+    @classmethod
+    def has_no_pending_work(cls, json_path) -> bool:
+        """待办索引有效且为空时返回True，可跳过整个文件而无需解析JSON"""
+        json_path = Path(json_path)
+        if json_path.with_name(f"{json_path.name}.journal").exists():
+            return False
+        index = cls._read_pending_file(cls.pending_index_path(json_path))
+        if not index or index.get("pending"):
+            return False
+        # 先比较大小，一致时再校验内容指纹
+        if json_path.stat().st_size != index.get("size"):
+            return False
+        return hashlib.sha256(json_path.read_bytes()).hexdigest() == index.get("sha256")
+
+    def _load_pending_indices(self, raw: bytes) -> Optional[List[int]]:
+        """读取与当前主文件内容匹配的待办索引"""
+        index = self._read_pending_file(self.pending_path)
+        if not index or index.get("size") != len(raw):
+            return None
+        if index.get("sha256") != hashlib.sha256(raw).hexdigest():
+            return None
+        return index.get("pending")
+
+    @staticmethod
+    def _read_pending_file(path: Path) -> Optional[Dict[str, Any]]:
+        """读取待办索引文件，缺失或损坏时返回None"""
+        try:
+            with path.open('r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_pending_index(self, data: List[Dict[str, Any]], raw: bytes) -> None:
+        """根据刚写入的主文件内容生成待办索引"""
+        index = {
+            "size": len(raw),
+            "sha256": hashlib.sha256(raw).hexdigest(),
+            "pending": [i for i, item in enumerate(data) if self.is_pending(item)]
+        }
+        tmp_path = self.pending_path.with_name(f"{self.pending_path.name}.tmp")
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.pending_path)
+
+    @staticmethod
+    def item_key(item: Dict[str, Any]) -> str:
+        """记录唯一标识 (与X-Bot条目ID一致)"""
+        return f"{item.get('file_name')}_{item.get('user', {}).get('screen_name')}_{item.get('media_type')}"
+
+    def _replay_journal(self, data: List[Dict[str, Any]]) -> None:
+        """回放上次中断遗留的状态日志"""
+        if not self.journal_path.exists():
+            return
+
+        by_key = {}
+        for i, item in enumerate(data):
+            by_key.setdefault(self.item_key(item), i)
+
+        applied = 0
+        with self.journal_path.open('r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 中断写入产生的残缺行
+                index = record.get("index")
+                # 主文件可能已被X-Bot合并新条目，下标失配时按标识查找
+                if not (isinstance(index, int) and 0 <= index < len(data)
+                        and self.item_key(data[index]) == record.get("key")):
+                    index = by_key.get(record.get("key"))
+                if index is None:
+                    continue
+                data[index].update(record.get("state", {}))
+                applied += 1
+        logger.info(f"♻️ 已回放状态日志: {applied} 条 ({self.journal_path.name})")
+
+    def _write_json(self, data: List[Dict[str, Any]]) -> None:
+        """原子写入主JSON文件，并刷新待办索引"""
+        raw = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        tmp_path = self.json_path.with_name(f"{self.json_path.name}.tmp")
+        with tmp_path.open('wb') as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.json_path)
+        self._write_pending_index(data, raw)
+
+    def _reset_journal(self, remove: bool) -> None:
+        """主JSON落盘后清空日志 (调用方持有锁)"""
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+        self._journal_records = 0
+        if remove:
+            self.journal_path.unlink(missing_ok=True)
+        elif self.journal_path.exists():
+            self.journal_path.open('w').close()
+
+
+# --------------------------
+# 下载缓存模块
+# --------------------------
+class DownloadCache:
+    """内容寻址下载缓存 (URL -> 内容哈希 -> 缓存对象)，跨用户/跨日期去重
+
+    缓存对象按 sha256 存放于 objects/<前2位>/<哈希>，index.json 记录URL映射、
+    对象大小与最近访问时间；总大小超过 CACHE_MAX_BYTES 时按最近最少使用淘汰。
+    """
+
+    _lock = threading.Lock()
+    _index: Optional[Dict[str, Any]] = None
+    _dirty = False
+    _hits = 0
+    _misses = 0
+    _bytes_saved = 0
+
+    @classmethod
+    def _root(cls) -> Path:
+        return Path(Config.DEFAULT_CACHE_DIR)
+
+    @classmethod
+    def _object_path(cls, digest: str) -> Path:
+        return cls._root() / "objects" / digest[:2] / digest
+
+    @classmethod
+    def _load_index(cls) -> Dict[str, Any]:
+        """加载缓存索引 (调用方持有锁)"""
+        if cls._index is None:
+            index_path = cls._root() / "index.json"
+            try:
+                with index_path.open('r', encoding='utf-8') as f:
+                    cls._index = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                cls._index = {"urls": {}, "objects": {}}
+        return cls._index
+
+    @classmethod
+    def contains(cls, url: str) -> bool:
+        """URL是否已有缓存对象 (不计入命中统计)"""
+        if not Config.CACHE_ENABLED:
+            return False
+        with cls._lock:
+            digest = cls._load_index()["urls"].get(url)
+        return bool(digest) and cls._object_path(digest).exists()
+
+    @classmethod
+    def fetch(cls, url: str, dest: Path) -> bool:
+        """缓存命中时将对象放置到目标路径并返回True，未命中返回False"""
+        if not Config.CACHE_ENABLED:
+            return False
+
+        with cls._lock:
+            index = cls._load_index()
+            digest = index["urls"].get(url)
+            meta = index["objects"].get(digest) if digest else None
+            object_path = cls._object_path(digest) if meta else None
+            if meta is None or not object_path.exists():
+                if digest:  # 对象已丢失，清理失效映射
+                    index["urls"].pop(url, None)
+                    index["objects"].pop(digest, None)
+                    cls._dirty = True
+                cls._misses += 1
+                return False
+            meta["last_access"] = datetime.now().timestamp()
+            cls._hits += 1
+            cls._bytes_saved += meta["size"]
+            cls._dirty = True
+
+        cls._place(object_path, dest)
+        return True
+
+    @classmethod
+    def store(cls, url: str, file_path: Path) -> None:
+        """将下载完成的文件纳入缓存 (内容相同的文件只保存一份)"""
+        if not Config.CACHE_ENABLED:
+            return
+
+        sha = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(block)
+        digest = sha.hexdigest()
+        object_path = cls._object_path(digest)
+
+        with cls._lock:
+            index = cls._load_index()
+            if not object_path.exists():
+                object_path.parent.mkdir(parents=True, exist_ok=True)
+                cls._place(file_path, object_path)
+            index["urls"][url] = digest
+            index["objects"][digest] = {
+                "size": object_path.stat().st_size,
+                "last_access": datetime.now().timestamp()
+            }
+            cls._dirty = True
+            cls._evict()
+
+    @staticmethod
+    def _place(src: Path, dest: Path) -> None:
+        """以硬链接放置文件 (跨文件系统时退化为复制)"""
+        tmp_path = dest.with_name(f"{dest.name}.tmp")
+        tmp_path.unlink(missing_ok=True)
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dest)
+
+    @classmethod
+    def _evict(cls) -> None:
+        """按LRU淘汰对象直至总大小不超过上限 (调用方持有锁)"""
+        objects = cls._index["objects"]
+        total = sum(meta["size"] for meta in objects.values())
+        if total <= Config.CACHE_MAX_BYTES:
+            return
+
+        evicted = set()
+        for digest, meta in sorted(objects.items(), key=lambda kv: kv[1]["last_access"]):
+            if total <= Config.CACHE_MAX_BYTES:
+                break
+            cls._object_path(digest).unlink(missing_ok=True)
+            total -= meta["size"]
+            evicted.add(digest)
+
+        for digest in evicted:
+            del objects[digest]
+        cls._index["urls"] = {url: d for url, d in cls._index["urls"].items() if d not in evicted}
+        logger.info(f"🧹 缓存淘汰: {len(evicted)} 个对象")
+
+    @classmethod
+    def save(cls) -> None:
+        """原子写入缓存索引"""
+        with cls._lock:
+            if not cls._dirty or cls._index is None:
+                return
+            root = cls._root()
+            root.mkdir(parents=True, exist_ok=True)
+            tmp_path = root / "index.json.tmp"
+            with tmp_path.open('w', encoding='utf-8') as f:
+                json.dump(cls._index, f)
+            os.replace(tmp_path, root / "index.json")
+            cls._dirty = False
+
+    @classmethod
+    def log_stats(cls) -> None:
+        """输出本次运行的缓存命中统计"""
+        if not Config.CACHE_ENABLED:
+            return
+        logger.info(
+            f"📦 下载缓存: 命中 {cls._hits} | 未命中 {cls._misses} | "
+            f"节省 {round(cls._bytes_saved / 1024 / 1024, 2)}MB"
+        )
+
 
 # --------------------------
 # 下载模块 (保持原始重试逻辑)
@@ -332,10 +1293,140 @@ class FileProcessor:
 class DownloadManager:
     """下载管理器 (保持原始重试计数器位置)"""
 
+    _host_slots: Dict[str, threading.BoundedSemaphore] = {}
+    _host_slots_lock = threading.Lock()
+    _path_locks: Dict[str, threading.Lock] = {}
+    _path_locks_lock = threading.Lock()
+    _completed_paths: set = set()  # 进程内已下载完成的目标路径
+
+    @classmethod
+    def process_items(cls, items: List[Dict[str, Any]], processor: FileProcessor,
+                      workers: int = Config.DOWNLOAD_WORKERS) -> None:
+        """并发下载多个条目 (单条目重试计数与状态记录同 process_item)"""
+        for item in cls.preflight(items, workers):
+            processor.record(item)
+        pending = [item for item in items
+                   if not item.get('is_downloaded') and not cls._is_too_large(item)]
+        if not pending:
+            return
+
+        def download(item: Dict[str, Any]) -> None:
+            cls.process_item(item, processor)
+            processor.record(item)
+
+        if workers <= 1 or len(pending) == 1:
+            for item in pending:
+                download(item)
+            return
+
+        logger.info(f"⏬ 并发下载: {len(pending)} 个文件，{workers} 个线程")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download") as executor:
+            # 消费结果以便抛出线程内未捕获的异常
+            list(executor.map(download, pending))
+
     @classmethod
+    def preflight(cls, items: List[Dict[str, Any]],
+                  workers: int = Config.DOWNLOAD_WORKERS) -> List[Dict[str, Any]]:
+        """并发HEAD预检视频大小，超出平台限制的条目直接标记 file_too_large，不下载正文
+
+        图片通常远小于上限，逐条HEAD只会使请求量翻倍，改由下载时按响应头 Content-Length 中止。
+        返回本次新标记的条目，由调用方记录状态。
+        """
+        if not Config.DOWNLOAD_PREFLIGHT:
+            return []
+        candidates = [
+            item for item in items
+            if not item.get('is_downloaded')
+            and item.get('media_type') == 'videos'
+            and not item.get('upload_info', {}).get('error_type')
+            and not DownloadCache.contains(item['url'])
+        ]
+        if not candidates:
+            return []
+
+        def check(item: Dict[str, Any]) -> None:
+            try:
+                with cls._host_slot(item['url']):
+                    response = HttpClient.head(
+                        cls.source_url(item['url']), allow_redirects=True, timeout=Config.PREFLIGHT_TIMEOUT,
+                        headers={'Accept-Encoding': 'identity'}
+                    )
+                length = response.headers.get('Content-Length')
+                if response.ok and length and length.isdigit():
+                    cls._check_size(item, int(length))
+            except FileTooLargeError as e:
+                cls._mark_too_large(item, e)
+            except Exception as e:
+                # 预检失败不影响下载，下载时仍会按响应头再次校验
+                logger.debug(f"预检失败: {item['file_name']} - {str(e)}")
+
+        logger.info(f"📏 视频下载前大小预检: {len(candidates)} 个文件")
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="preflight") as executor:
+            list(executor.map(check, candidates))
+        return [item for item in candidates if cls._is_too_large(item)]
+
+    @staticmethod
+    def source_url(url: str) -> str:
+        """实际请求的媒体地址 (配置 MEDIA_BASE_URL 时改写主机，缓存与续传仍以原始URL为键)"""
+        if not Config.MEDIA_BASE_URL:
+            return url
+        parsed = urlparse(url)
+        path = f"{parsed.path}?{parsed.query}" if parsed.query else parsed.path
+        return f"{Config.MEDIA_BASE_URL}/{parsed.netloc}{path}"
+
+    @staticmethod
+    def size_limit(item: Dict[str, Any]) -> Optional[int]:
+        """条目媒体类型对应的平台大小上限 (无限制时为None)"""
+        if item.get('media_type') not in ['images', 'videos']:
+            return None
+        return Config.TELEGRAM_LIMITS[item['media_type']]
+
+    @classmethod
+    def _check_size(cls, item: Dict[str, Any], size: int) -> None:
+        """大小超出平台限制时抛出 FileTooLargeError"""
+        limit = cls.size_limit(item)
+        if limit is not None and size > limit:
+            raise FileTooLargeError(cls._too_large_message(size, limit))
+
+    @staticmethod
+    def _is_too_large(item: Dict[str, Any]) -> bool:
+        return item.get('upload_info', {}).get('error_type') == 'file_too_large'
+
+    @classmethod
+    def _mark_too_large(cls, item: Dict[str, Any], error: FileTooLargeError) -> None:
+        """标记为不可恢复的 file_too_large (后续由上传阶段统一发送告警)"""
+        item['upload_info'] = cls._build_error_info(
+            error, "file_too_large", existing_info=item.get('upload_info', {})
+        )
+        logger.warning(f"⏭ 文件过大，跳过下载: {item['file_name']} - {str(error)}")
+
+    @classmethod
+    def _host_slot(cls, url: str) -> threading.BoundedSemaphore:
+        """获取实际请求主机的连接槽位 (限制单主机并发连接数，配置 MEDIA_BASE_URL 时按改写后的主机计)"""
+        host = urlparse(cls.source_url(url)).netloc
+        with cls._host_slots_lock:
+            slot = cls._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(max(1, Config.MAX_CONNECTIONS_PER_HOST))
+                cls._host_slots[host] = slot
+        return slot
+
+    @classmethod
+    def _path_lock(cls, file_path: Path) -> threading.Lock:
+        """获取目标路径的下载锁"""
+        with cls._path_locks_lock:
+            return cls._path_locks.setdefault(str(file_path), threading.Lock())
+
+    @classmethod
+    def _downloaded_in_run(cls, file_path: Path) -> bool:
+        """同名文件已由本进程内其他条目下载完成 (调用方持有路径锁)"""
+        return str(file_path) in cls._completed_paths and file_path.exists()
+
+    @classmethod
+    @metrics.timed("tbot.download_item")
     def process_item(cls, item: Dict[str, Any], processor: FileProcessor) -> None:
         """处理单个文件下载 (保持特殊类型处理)"""
-        if item.get('is_downloaded'):
+        if item.get('is_downloaded') or cls._is_too_large(item):
             return
 
         # 保持原始特殊类型处理
@@ -366,41 +1457,198 @@ class DownloadManager:
             )
             return
 
+        file_path = processor.download_path / item['file_name']
+        # 不同用户的同一媒体文件名相同：同一目标路径的下载/续传/缓存串行执行，避免共用 .part 分片
+        with cls._path_lock(file_path):
+            resume_from = cls._part_size(file_path)
+            try:
+                if cls._downloaded_in_run(file_path):
+                    logger.info(f"📦 复用本次已下载的同名文件: {item['file_name']}")
+                elif DownloadCache.fetch(item['url'], file_path):
+                    logger.info(f"📦 缓存命中: {item['file_name']}")
+                    metrics.incr("tbot.download.cache_hit")
+                else:
+                    if resume_from:
+                        logger.info(f"⏬ 续传下载: {item['file_name']} (已有{resume_from // 1024}KB)")
+                    else:
+                        logger.info(f"⏬ 开始下载: {item['file_name']}")
+                    with cls._host_slot(item['url']):
+                        cls._download_resumable(item['url'], file_path, cls.size_limit(item))
+                    DownloadCache.store(item['url'], file_path)
+                cls._completed_paths.add(str(file_path))
+
+                # 更新下载状态 (保持原始数据结构)
+                file_size = os.path.getsize(file_path)
+                download_info.update({
+                    "success": True,
+                    "size": file_size,
+                    "size_mb": round(file_size / 1024 / 1024, 2),
+                    "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+                    "download_attempts": 0  # 重置计数器
+                })
+                item['is_downloaded'] = True
+                logger.info(f"✓ 下载成功: {item['file_name']} ({file_size // 1024}KB)")
+                metrics.incr("tbot.download.success")
+                metrics.observe("tbot.download_bytes", file_size)
+
+            except FileTooLargeError as e:
+                cls._discard_part(file_path)
+                cls._mark_too_large(item, e)
+                metrics.incr("tbot.download.too_large")
+
+            except Exception as e:
+                part_size = cls._part_size(file_path)
+                if part_size > resume_from:
+                    # 本次已有进展：保留分片待下次续传，不消耗重试次数
+                    logger.warning(f"↻ 下载中断，已保留{part_size // 1024}KB待续传: {item['file_name']} - {str(e)}")
+                    return
+
+                download_info['download_attempts'] = current_attempts + 1
+                error_msg = f"✗ 下载失败: {item['file_name']} - {str(e)}"
+                logger.error(error_msg)
+                metrics.incr("tbot.download.failed")
+
+                if download_info['download_attempts'] >= Config.MAX_DOWNLOAD_ATTEMPTS:
+                    item['upload_info'] = {
+                        "success": False,
+                        "error_type": "max_download_attempts",
+                        "message": str(e),
+                        "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+                        "notification_sent": False  # 标记未通知，后续统一处理
+                    }
+
+    @classmethod
+    def _download_resumable(cls, url: str, file_path: Path, limit: Optional[int] = None) -> None:
+        """下载到目标路径，连接中断且有进展时在本次调用内立即续传"""
+        for retry in range(Config.DOWNLOAD_RESUME_RETRIES + 1):
+            before = cls._part_size(file_path)
+            try:
+                cls._download_part(url, file_path, limit)
+                return
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                after = cls._part_size(file_path)
+                if retry == Config.DOWNLOAD_RESUME_RETRIES or after <= before:
+                    raise
+                logger.warning(f"↻ 连接中断，从{after // 1024}KB处续传: {file_path.name} - {str(e)}")
+
+    @classmethod
+    def _download_part(cls, url: str, file_path: Path, limit: Optional[int] = None) -> None:
+        """写入 .part 分片并在校验完整后落盘 (已有分片时以 Range/If-Range 续传)
+
+        limit 为大小上限：响应头声明的总大小或实际写入量超出时立即中止并抛出 FileTooLargeError。
+        """
+        part_path = file_path.with_name(f"{file_path.name}.part")
+        meta_path = file_path.with_name(f"{file_path.name}.part.json")
+        meta = cls._load_part_meta(meta_path, url)
+        offset = part_path.stat().st_size if meta and part_path.exists() else 0
+
+        headers = {'Accept-Encoding': 'identity'}  # 禁用传输压缩，保证字节偏移一致
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+            validator = meta.get('etag') or meta.get('last_modified')
+            if validator:
+                headers['If-Range'] = validator  # 资源已变化时服务端返回完整的200响应
+
+        response = HttpClient.get(cls.source_url(url), stream=True, timeout=30, headers=headers)
+        with response:
+            if response.status_code == 416 and offset and offset == meta.get('total'):
+                total = offset  # 分片此前已完整，仅差落盘
+            else:
+                response.raise_for_status()
+                offset, total = cls._resolve_range(response, offset, meta)
+                if limit is not None and total is not None and total > limit:
+                    raise FileTooLargeError(cls._too_large_message(total, limit))
+                if not offset:
+                    cls._save_part_meta(meta_path, url, response, total)
+
+                written = offset
+                with open(part_path, 'ab' if offset else 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=cls._chunk_size(total)):
+                        written += len(chunk)
+                        if limit is not None and written > limit:  # 未声明长度时按实际写入量中止
+                            raise FileTooLargeError(cls._too_large_message(written, limit))
+                        f.write(chunk)
+
+        size = part_path.stat().st_size
+        if total is not None and size != total:
+            raise IOError(f"下载不完整: {size}/{total} 字节")
+        # 替换目录项而非改写原文件，不影响与缓存对象共享的硬链接
+        os.replace(part_path, file_path)
+        meta_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _resolve_range(response: requests.Response, offset: int,
+                       meta: Optional[Dict[str, Any]]) -> tuple:
+        """解析响应实际返回的字节范围，返回 (写入起点, 文件总大小)"""
+        if response.status_code != 206:
+            length = response.headers.get('Content-Length')
+            return 0, int(length) if length and length.isdigit() else None
+
+        # Content-Range: bytes <start>-<end>/<total>
+        content_range = response.headers.get('Content-Range', '')
         try:
-            logger.info(f"⏬ 开始下载: {item['file_name']}")
-            response = requests.get(item['url'], stream=True, timeout=30)
-            response.raise_for_status()
+            span, total = content_range.split(' ', 1)[1].split('/')
+            start = int(span.split('-')[0])
+        except (IndexError, ValueError):
+            raise IOError(f"无效的Content-Range: {content_range}")
+
+        etag = response.headers.get('ETag')
+        if start != offset or (meta.get('etag') and etag and etag != meta['etag']):
+            raise IOError("续传校验失败，资源已变化")
+        total = int(total) if total.isdigit() else None
+        if meta.get('total') is not None and total != meta['total']:
+            raise IOError("续传校验失败，文件大小已变化")
+        return offset, total
 
-            file_path = processor.download_path / item['file_name']
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-
-            # 更新下载状态 (保持原始数据结构)
-            file_size = os.path.getsize(file_path)
-            download_info.update({
-                "success": True,
-                "size": file_size,
-                "size_mb": round(file_size / 1024 / 1024, 2),
-                "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-                "download_attempts": 0  # 重置计数器
-            })
-            item['is_downloaded'] = True
-            logger.info(f"✓ 下载成功: {item['file_name']} ({file_size // 1024}KB)")
+    @staticmethod
+    def _too_large_message(size: int, limit: int) -> str:
+        return f"文件大小 {round(size / 1024 / 1024, 2)}MB 超过限制 {limit // 1024 // 1024}MB"
 
-        except Exception as e:
-            download_info['download_attempts'] = current_attempts + 1
-            error_msg = f"✗ 下载失败: {item['file_name']} - {str(e)}"
-            logger.error(error_msg)
-
-            if download_info['download_attempts'] >= Config.MAX_DOWNLOAD_ATTEMPTS:
-                item['upload_info'] = {
-                    "success": False,
-                    "error_type": "max_download_attempts",
-                    "message": str(e),
-                    "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-                    "notification_sent": False  # 标记未通知，后续统一处理
-                }
+    @staticmethod
+    def _discard_part(file_path: Path) -> None:
+        """删除分片及其元数据"""
+        file_path.with_name(f"{file_path.name}.part").unlink(missing_ok=True)
+        file_path.with_name(f"{file_path.name}.part.json").unlink(missing_ok=True)
+
+    @staticmethod
+    def _chunk_size(total: Optional[int]) -> int:
+        """按文件大小调整读取块 (约百分之一，限制在上下界之间)"""
+        if not total:
+            return Config.DOWNLOAD_CHUNK_MIN * 8
+        return min(max(total // 100, Config.DOWNLOAD_CHUNK_MIN), Config.DOWNLOAD_CHUNK_MAX)
+
+    @staticmethod
+    def _part_size(file_path: Path) -> int:
+        """当前 .part 分片大小"""
+        try:
+            return file_path.with_name(f"{file_path.name}.part").stat().st_size
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _load_part_meta(meta_path: Path, url: str) -> Optional[Dict[str, Any]]:
+        """读取分片元数据，URL不一致或损坏时视为无可续传分片"""
+        try:
+            with meta_path.open('r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return meta if meta.get('url') == url else None
+
+    @staticmethod
+    def _save_part_meta(meta_path: Path, url: str, response: requests.Response,
+                        total: Optional[int]) -> None:
+        """记录续传所需的校验信息 (弱ETag不可用于If-Range，仅保留强ETag)"""
+        etag = response.headers.get('ETag')
+        meta = {
+            "url": url,
+            "etag": etag if etag and not etag.startswith('W/') else None,
+            "last_modified": response.headers.get('Last-Modified'),
+            "total": total
+        }
+        with meta_path.open('w', encoding='utf-8') as f:
+            json.dump(meta, f)
 
     @classmethod
     def _build_error_info(
@@ -442,9 +1690,11 @@ class UploadManager:
         self.lark_notifier = LarkNotifier(
             env_vars['lark_key'],
             env_vars.get('lark_app_id'),
-            env_vars.get('lark_app_secret')
+            env_vars.get('lark_app_secret'),
+            env_vars.get('lark_chat_id')
         )
         
+    @metrics.timed("tbot.upload_item")
     def process_item(self, item: Dict[str, Any], processor: FileProcessor) -> None:
         """处理文件上传 (保持特殊类型处理)"""
         if not self._should_upload(item):
@@ -551,6 +1801,7 @@ class UploadManager:
         # 错误类型判断
         if isinstance(error, FileTooLargeError):
             error_type = 'file_too_large'
+            logger.warning(f"⏭ 文件超出飞书上传限制: {item['file_name']} - {str(error)}")
         else:
             error_type = 'api_error'
             # 其他错误类型直接通知（无标记检查）
@@ -579,28 +1830,105 @@ class UploadManager:
         }
 
 
+# --------------------------
+# 异步流水线 (下载/上传阶段重叠执行)
+# --------------------------
+class AsyncPipeline:
+    """asyncio流水线：下载与上传阶段经有界队列衔接，单条下载完成即可开始上传
+
+    各阶段仍调用 DownloadManager/UploadManager.process_item，条目状态流转与同步路径一致。
+    """
+
+    def __init__(self, processor: FileProcessor, download_manager: DownloadManager,
+                 upload_manager: UploadManager):
+        self.processor = processor
+        self.download_manager = download_manager
+        self.upload_manager = upload_manager
+        self.download_workers = max(1, Config.DOWNLOAD_WORKERS)
+        self.upload_workers = max(1, Config.ASYNC_UPLOAD_WORKERS)
+        self.max_concurrency = max(1, Config.ASYNC_MAX_CONCURRENCY)
+
+    def run(self, items: List[Dict[str, Any]]) -> None:
+        """同步入口：先完成大小预检，再在独立事件循环中执行流水线"""
+        for item in self.download_manager.preflight(items, self.download_workers):
+            self.processor.record(item)
+        asyncio.run(self._run(items))
+
+    async def _run(self, items: List[Dict[str, Any]]) -> None:
+        download_queue: asyncio.Queue = asyncio.Queue(maxsize=Config.ASYNC_QUEUE_SIZE)
+        upload_queue: asyncio.Queue = asyncio.Queue(maxsize=Config.ASYNC_QUEUE_SIZE)
+        limiter = asyncio.Semaphore(self.max_concurrency)  # 下载与上传共享的总并发上限
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="pipeline")
+        loop = asyncio.get_running_loop()
+
+        def process(func, item):
+            func(item, self.processor)
+            self.processor.record(item)
+
+        async def call(func, item):
+            async with limiter:
+                await loop.run_in_executor(executor, process, func, item)
+
+        async def feed():
+            for item in items:
+                await download_queue.put(item)
+            for _ in range(self.download_workers):
+                await download_queue.put(None)
+
+        async def download_stage():
+            while (item := await download_queue.get()) is not None:
+                if not item.get('is_downloaded'):
+                    await call(self.download_manager.process_item, item)
+                await upload_queue.put(item)
+
+        async def upload_stage():
+            while (item := await upload_queue.get()) is not None:
+                if not item.get('is_uploaded'):
+                    await call(self.upload_manager.process_item, item)
+
+        logger.info(
+            f"⚡ 异步流水线: {len(items)} 条记录 | 下载协程 {self.download_workers} | "
+            f"上传协程 {self.upload_workers} | 总并发 {self.max_concurrency}"
+        )
+        try:
+            uploaders = [asyncio.create_task(upload_stage()) for _ in range(self.upload_workers)]
+            await asyncio.gather(feed(), *(download_stage() for _ in range(self.download_workers)))
+            for _ in uploaders:
+                await upload_queue.put(None)
+            await asyncio.gather(*uploaders)
+        finally:
+            executor.shutdown(wait=True)
+
+
 # --------------------------
 # 主流程 (保持原始批量处理逻辑)
 # --------------------------
-def process_single(json_path: str, download_dir: str = Config.DEFAULT_DOWNLOAD_DIR) -> None:
+def process_single(json_path: str, download_dir: str = Config.DEFAULT_DOWNLOAD_DIR,
+                   use_async: bool = False) -> None:
     """处理单个文件 (保持原始异常处理)"""
     try:
         logger.info(f"\n{'-' * 40}\n🔍 开始处理: {json_path}")
         processor = FileProcessor(json_path, download_dir)
         data = processor.load_data()
+        items = processor.pending_items(data)  # 仅处理仍有待办工作的条目
 
         download_manager = DownloadManager()
         upload_manager = UploadManager()
 
-        for item in data:
-            # 保持原始处理顺序：先下载再上传
-            if not item.get('is_downloaded'):
-                download_manager.process_item(item, processor)
+        if use_async:
+            # 异步流水线：下载与上传重叠执行
+            AsyncPipeline(processor, download_manager, upload_manager).run(items)
+        else:
+            # 先并发完成下载，再按原始顺序逐条上传
+            download_manager.process_items(items, processor)
 
-            if not item.get('is_uploaded'):
-                upload_manager.process_item(item, processor)
+            for item in items:
+                if not item.get('is_uploaded'):
+                    upload_manager.process_item(item, processor)
+                    processor.record(item)
 
         processor.save_data(data)
+        DownloadCache.save()
         logger.info(f"✅ 文件处理完成\n{'-' * 40}\n")
 
     except Exception as e:
@@ -609,7 +1937,7 @@ def process_single(json_path: str, download_dir: str = Config.DEFAULT_DOWNLOAD_D
         raise
 
 
-def batch_process(days: int = 7) -> None:
+def batch_process(days: int = 7, use_async: bool = False) -> None:
     """批量处理 (保持原始日期回溯逻辑)"""
     base_dir = Path(Config.DEFAULT_OUTPUT_DIR)
     for i in range(days, -1, -1):  # 保持原始倒序处理
@@ -617,29 +1945,37 @@ def batch_process(days: int = 7) -> None:
         date_str = target_date.strftime("%Y-%m-%d")
         json_path = base_dir / f"{date_str[:7]}/{date_str}.json"
 
-        if json_path.exists():
-            process_single(str(json_path))
-        else:
+        if not json_path.exists():
             logger.info(f"⏭ 跳过不存在文件: {json_path}")
+        elif FileProcessor.has_no_pending_work(json_path):
+            logger.info(f"⏭ 无待处理记录，跳过: {json_path}")
+        else:
+            process_single(str(json_path), use_async=use_async)
 
 
 def main():
     args = sys.argv[1:]  # 获取命令行参数
+    use_async = "--async" in args  # 异步流水线模式
+    args = [arg for arg in args if arg != "--async"]
 
     if len(args) == 2:
-        process_single(args[0], args[1])
+        process_single(args[0], args[1], use_async=use_async)
     elif len(args) == 1:
-        process_single(args[0])
+        process_single(args[0], use_async=use_async)
     elif len(args) == 0:
-        batch_process()
+        batch_process(use_async=use_async)
     else:
         logger.error("错误：参数数量不正确。")
-        logger.info("使用方法：python T-Bot.py [<JSON文件路径> <下载目录>]")
+        logger.info("使用方法：python T-Bot.py [<JSON文件路径> <下载目录>] [--async]")
         logger.info("示例：")
         logger.info("使用参数：python T-Bot.py ../output/2000-01/2000-01-01.json ../downloads(默认)")
         logger.info("使用默认：python T-Bot.py")
+        logger.info("异步流水线：python T-Bot.py --async")
         sys.exit(1)
 
+    HttpClient.log_stats()
+    DownloadCache.log_stats()
+
 
 if __name__ == "__main__":
     try:
@@ -651,3 +1987,5 @@ if __name__ == "__main__":
     except Exception as e:
         logger.error(f"💥 未处理的异常: {str(e)}")
         sys.exit(1)
+    finally:
+        logger.info(f"📊 运行指标已写入: {metrics.write_report('T-Bot', Config.DEFAULT_LOG_DIR)}")
@@ -3,6 +3,25 @@ import json
 import logging
 from datetime import datetime, timedelta
 import os
+import mmap
+import bisect
+import heapq
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import math
+import struct
+from array import array
+
+import metrics
+
+try:
+    import ijson  # 可选依赖：C加速的流式JSON解析
+
+    JSON_STREAM_ERRORS = (json.JSONDecodeError, ijson.JSONError)
+except ImportError:
+    ijson = None
+    JSON_STREAM_ERRORS = (json.JSONDecodeError,)
 
 
 # --------------------
@@ -14,12 +33,27 @@ class Config:
     SHARD_DIR = "../dataBase/"  # 分片存储目录
     FORMAT_SHARDS = True  # 是否格式化分片文件
     SHARD_PREFIX = "processed_entries_"
+    SHARD_LOG_SUFFIX = ".jsonl"  # 当前分片的追加日志后缀（写满后压实为.json）
+    INDEX_FILE = "processed_index.bin"  # 已处理条目哈希索引（可由分片重建）
+    INDEX_MANIFEST = "processed_index.manifest.json"  # 索引对应的分片清单
+    INDEX_RUN_PREFIX = "processed_index.run-"  # 索引增量段文件前缀（每次运行新增的有序哈希）
+    INDEX_MAX_RUNS = 8  # 增量段超过该数量时归并入主索引
+    BLOOM_ENABLED = True  # 是否在索引前启用布隆过滤器预筛
+    BLOOM_FILE = "processed_bloom.bin"  # 布隆过滤器文件（可由分片重建）
+    BLOOM_FP_RATE = 0.01  # 布隆过滤器误判率
+    BLOOM_MIN_CAPACITY = 100000  # 布隆过滤器最小容量
 
     # 路径配置
     DEFAULT_INPUT_DIR = "../../TypeScript/tweets/"  # 默认输入目录
     DEFAULT_OUTPUT_DIR = "../output/"  # 默认输出目录
     DEFAULT_LOG_DIR = "../logs/"  # 默认日志目录
 
+    # 输入配置
+    STREAM_CHUNK_SIZE = 64 * 1024  # 流式读取输入文件的块大小
+
+    # 输出配置
+    INCREMENTAL_MERGE = True  # 已有输出有序时对新增条目线性归并，避免整体重排
+
     # 日期格式
     DATE_FORMAT = "%Y-%m-%d %H:%M:%S"  # 时间戳格式
     YEAR_MONTH_DAY = "%Y-%m-%d"  # 年月日格式
@@ -70,10 +104,18 @@ logger = configure_logging()
 # 分片管理器
 # --------------------
 class ShardManager:
-    """管理已处理条目的分片存储"""
+    """管理已处理条目的分片存储
+
+    当前分片以追加日志(.jsonl，每行一个ID)的形式写入，批次结束时统一fsync；
+    分片写满或跨月时才压实为 processed_entries_YYYY-MM-NNNN.json 格式。
+    """
 
     def __init__(self):
         self._ensure_shard_dir()
+        self._active_year_month = None  # 当前日志分片所属年月
+        self._active_path = None  # 当前日志分片路径
+        self._active_count = 0  # 当前日志分片条目数
+        self._log_file = None  # 当前日志分片文件句柄
 
     def _ensure_shard_dir(self):
         """确保分片目录存在"""
@@ -92,53 +134,180 @@ class ShardManager:
         }
 
     def _get_max_shard_number(self, year_month):
-        """获取指定年月最大分片号"""
+        """获取指定年月最大分片号（含日志分片）"""
         max_num = 0
-        for file_path in self._list_shard_files():
+        for file_path in self._list_shard_files() + self._list_log_files():
             if f"_{year_month}-" in file_path:
                 num = self._parse_shard_number(file_path)
                 max_num = max(max_num, num)
         return max_num
 
     def _list_shard_files(self):
-        """列出所有分片文件"""
+        """列出所有已压实的分片文件"""
         return [
             os.path.join(Config.SHARD_DIR, f)
             for f in os.listdir(Config.SHARD_DIR)
             if f.startswith(Config.SHARD_PREFIX) and f.endswith(".json")
         ]
 
+    def _list_log_files(self):
+        """列出所有追加日志分片文件"""
+        return [
+            os.path.join(Config.SHARD_DIR, f)
+            for f in os.listdir(Config.SHARD_DIR)
+            if f.startswith(Config.SHARD_PREFIX) and f.endswith(Config.SHARD_LOG_SUFFIX)
+        ]
+
     @staticmethod
     def _parse_shard_number(file_path):
         """从文件路径解析分片编号"""
         filename = os.path.basename(file_path)
         return int(filename.split("-")[-1].split(".")[0])
 
+    @staticmethod
+    def _parse_year_month(file_path):
+        """从文件路径解析分片年月"""
+        filename = os.path.basename(file_path)
+        return filename[len(Config.SHARD_PREFIX):].rsplit("-", 1)[0]
+
     def save_entry_id(self, entry_id):
-        """保存条目ID到合适的分片"""
-        shard_info = self.get_current_shard_info()
-        candidate_path = self._build_shard_path(shard_info["year_month"], shard_info["current_max"])
+        """追加条目ID到当前日志分片（需调用 flush 落盘）"""
+        self._ensure_active_shard()
+
+        if self._active_count >= Config.MAX_ENTRIES_PER_SHARD:
+            self._roll_over()
+
+        self._log_file.write(json.dumps(entry_id) + "\n")
+        self._active_count += 1
+        logger.debug(f"📥 条目 {entry_id} 已追加至分片: {self._active_path}")
+        return self._active_path
+
+    def save_entry_ids(self, entry_ids):
+        """批量保存条目ID：填满当前分片后溢出到新分片，每个分片仅写入一次"""
+        ids = list(dict.fromkeys(entry_ids))  # 批内去重并保持顺序
+        touched = []
+        pos = 0
+
+        while pos < len(ids):
+            self._ensure_active_shard()
+            room = max(Config.MAX_ENTRIES_PER_SHARD - self._active_count, 0)
+            chunk = ids[pos:pos + room]
+            pos += len(chunk)
+            touched.append(self._active_path)
+
+            if self._active_count + len(chunk) >= Config.MAX_ENTRIES_PER_SHARD:
+                # 本批将写满当前分片：连同新条目直接压实为JSON
+                self._compact_active(chunk)
+            else:
+                self._log_file.write("".join(json.dumps(e) + "\n" for e in chunk))
+                self._active_count += len(chunk)
+
+        self.flush()
+        if ids:
+            logger.info(f"📥 批量写入条目: {len(ids)} | 涉及分片: {len(touched)}")
+        return touched
+
+    def flush(self):
+        """批次结束：刷新并fsync当前日志分片"""
+        if self._log_file is None:
+            return
+        self._log_file.flush()
+        os.fsync(self._log_file.fileno())
+        logger.debug(f"💾 分片已落盘: {self._active_path} (条目数: {self._active_count})")
+
+    def close(self):
+        """关闭当前日志分片（不压实，下次运行继续追加）"""
+        if self._log_file is None:
+            return
+        self.flush()
+        self._log_file.close()
+        self._log_file = None
+        self._active_path = None
+        self._active_year_month = None
+        self._active_count = 0
+
+    def _ensure_active_shard(self):
+        """确保当前月份的日志分片已打开"""
+        year_month = datetime.now().strftime(Config.YEAR_MONTH)
+        if self._log_file is not None and self._active_year_month == year_month:
+            return
 
-        # 尝试写入现有分片
-        if os.path.exists(candidate_path):
-            try:
-                with open(candidate_path, "r+") as f:
-                    entries = json.load(f)
-                    if len(entries) < Config.MAX_ENTRIES_PER_SHARD:
-                        entries.append(entry_id)
-                        f.seek(0)
-                        json.dump(entries, f, indent=2 if Config.FORMAT_SHARDS else None)
-                        logger.debug(f"📥 条目 {entry_id} 已写入现有分片: {candidate_path}")
-                        return candidate_path
-            except json.JSONDecodeError:
-                logger.warning("🔄 检测到损坏分片，尝试修复...")
-                return self._handle_corrupted_shard(candidate_path, entry_id)
+        # 跨月：压实上月日志分片
+        if self._log_file is not None:
+            self._compact_active()
 
-        # 创建新分片
-        new_path = self._build_shard_path(shard_info["year_month"], shard_info["next_shard"])
-        self._write_shard(new_path, [entry_id])
-        logger.info(f"✨ 创建新分片: {new_path}")
-        return new_path
+        self._compact_stale_logs(year_month)
+        self._open_active_shard(year_month)
+
+    def _open_active_shard(self, year_month):
+        """打开指定年月的日志分片，必要时迁移未写满的旧JSON分片"""
+        max_shard = self._get_max_shard_number(year_month)
+        log_path = self._build_log_path(year_month, max_shard)
+        json_path = self._build_shard_path(year_month, max_shard)
+
+        if max_shard and os.path.exists(json_path) and os.path.exists(log_path):
+            # 压实中断：JSON已写入但日志未删除，以JSON为准
+            os.remove(log_path)
+            logger.warning(f"🧹 清理已压实的残留日志分片: {log_path}")
+
+        if max_shard and os.path.exists(log_path):
+            entries = self._read_log(log_path)
+            if not self._log_ends_cleanly(log_path):
+                # 上次写入中断：重写日志去除残缺行，避免后续追加粘连
+                self._write_log(log_path, entries)
+                logger.warning(f"🔧 已修复中断写入的日志分片: {log_path}")
+            count = len(entries)
+        elif max_shard and os.path.exists(json_path):
+            entries = self._read_json_shard(json_path)
+            if entries is not None and len(entries) < Config.MAX_ENTRIES_PER_SHARD:
+                # 一次性迁移未写满的旧分片为日志格式
+                self._write_log(log_path, entries)
+                os.remove(json_path)
+                count = len(entries)
+                logger.info(f"🔁 迁移现有分片为追加日志: {json_path}")
+            else:
+                max_shard += 1
+                log_path = self._build_log_path(year_month, max_shard)
+                count = 0
+        else:
+            max_shard += 1
+            log_path = self._build_log_path(year_month, max_shard)
+            count = 0
+
+        if count == 0:
+            logger.info(f"✨ 创建新分片: {log_path}")
+
+        self._log_file = open(log_path, "a", encoding="utf-8")
+        self._active_path = log_path
+        self._active_year_month = year_month
+        self._active_count = count
+
+    def _roll_over(self):
+        """当前分片写满：压实并开启下一个分片"""
+        year_month = self._active_year_month
+        self._compact_active()
+        self._open_active_shard(year_month)
+
+    def _compact_active(self, extra_entries=()):
+        """压实当前打开的日志分片（可附带尚未写入日志的条目）"""
+        path = self._active_path
+        self.close()
+        self._compact_log(path, extra_entries)
+
+    def _compact_stale_logs(self, year_month):
+        """压实非当前月份遗留的日志分片"""
+        for log_path in self._list_log_files():
+            if self._parse_year_month(log_path) != year_month:
+                self._compact_log(log_path)
+
+    def _compact_log(self, log_path, extra_entries=()):
+        """将日志分片压实为标准JSON分片"""
+        entries = self._read_log(log_path)
+        entries.extend(extra_entries)
+        json_path = log_path[:-len(Config.SHARD_LOG_SUFFIX)] + ".json"
+        self._write_shard(json_path, entries)
+        os.remove(log_path)
+        logger.info(f"📦 分片已压实: {json_path} (条目数: {len(entries)})")
 
     def _build_shard_path(self, year_month, shard_number):
         """构建分片文件路径"""
@@ -147,35 +316,416 @@ class ShardManager:
             f"{Config.SHARD_PREFIX}{year_month}-{shard_number:04d}.json"
         )
 
-    def _handle_corrupted_shard(self, path, entry_id):
-        """处理损坏的分片文件"""
-        try:
-            self._write_shard(path, [entry_id])
-            logger.warning(f"✅ 成功修复损坏分片: {path}")
-            return path
-        except Exception as e:
-            logger.error(f"❌ 修复分片失败: {str(e)}")
-            raise
+    def _build_log_path(self, year_month, shard_number):
+        """构建日志分片文件路径"""
+        return os.path.join(
+            Config.SHARD_DIR,
+            f"{Config.SHARD_PREFIX}{year_month}-{shard_number:04d}{Config.SHARD_LOG_SUFFIX}"
+        )
 
     def _write_shard(self, path, data):
-        """写入分片文件"""
-        with open(path, "w") as f:
+        """写入分片文件（临时文件+重命名，避免半写分片）"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
             json.dump(data, f, indent=2 if Config.FORMAT_SHARDS else None)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _write_log(path, entries):
+        """写入日志分片文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(e) + "\n" for e in entries)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _read_json_shard(path):
+        """读取JSON分片，损坏时返回None"""
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ 跳过损坏分片 {path}: {str(e)}")
+            return None
+
+    @staticmethod
+    def _log_ends_cleanly(path):
+        """检查日志分片是否以换行结尾"""
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    @staticmethod
+    def _read_log(path):
+        """读取日志分片，忽略中断写入产生的残缺行"""
+        entries = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"⚠️ 跳过日志分片残缺行 {path}: {line[:50]}")
+        return entries
 
+    @metrics.timed("xbot.load_processed_entries")
     def load_processed_entries(self):
         """加载所有已处理条目"""
         processed = set()
         for file_path in self._list_shard_files():
-            try:
-                with open(file_path, "r") as f:
-                    entries = json.load(f)
-                    processed.update(entries)
-                    logger.debug(f"📖 加载分片: {file_path} (条目数: {len(entries)})")
-            except Exception as e:
-                logger.warning(f"⚠️ 跳过损坏分片 {file_path}: {str(e)}")
+            entries = self._read_json_shard(file_path)
+            if entries is None:
+                continue
+            processed.update(entries)
+            logger.debug(f"📖 加载分片: {file_path} (条目数: {len(entries)})")
+        for file_path in self._list_log_files():
+            entries = self._read_log(file_path)
+            processed.update(entries)
+            logger.debug(f"📖 加载日志分片: {file_path} (条目数: {len(entries)})")
         logger.info(f"🔍 已加载历史条目总数: {len(processed)}")
         return processed
 
+    @metrics.timed("xbot.load_processed_index")
+    def load_processed_index(self):
+        """加载已处理条目的持久化哈希索引，变更分片中的新哈希以有序增量段追加，段数过多时再归并"""
+        index_path = os.path.join(Config.SHARD_DIR, Config.INDEX_FILE)
+        manifest_path = os.path.join(Config.SHARD_DIR, Config.INDEX_MANIFEST)
+
+        current = {
+            os.path.basename(p): os.path.getsize(p)
+            for p in self._list_shard_files() + self._list_log_files()
+        }
+        manifest = self._load_index_manifest(manifest_path)
+        indexed = manifest.get("shards", {}) if manifest else {}
+        runs = manifest.get("runs", []) if manifest else []
+
+        # 分片只会追加或在.json/.jsonl之间转换，其余删除视为索引失效
+        stems = {self._shard_stem(name) for name in current}
+        removed = [n for n in indexed if n not in current and self._shard_stem(n) not in stems]
+        full_rebuild = (
+                manifest is None
+                or manifest.get("byteorder") != sys.byteorder
+                or not os.path.exists(index_path)
+                or not all(os.path.exists(self._index_path(run)) for run in runs)
+                or bool(removed)
+        )
+
+        changed = [n for n, size in current.items() if full_rebuild or indexed.get(n) != size]
+        new_run = None
+        count = manifest.get("count", 0) if manifest else 0
+        previous_generation = manifest.get("generation") if manifest else None
+        if full_rebuild:
+            runs = []
+            count = self._write_index(index_path, sorted(self._iter_hashes(changed)))
+            self._remove_stale_runs(runs)
+            logger.info(f"🗂️ 索引全量重建完成: 分片 {len(changed)} 个")
+        elif changed:
+            # 仅保留索引中尚不存在的哈希，活跃.jsonl被重读时不会重复计入
+            existing = ProcessedIndex(index_path, [self._index_path(run) for run in runs])
+            new_run = array("Q", sorted({h for h in self._iter_hashes(changed) if not existing.contains_hash(h)}))
+            count = len(existing) + len(new_run)
+            if new_run:
+                run_name = f"{Config.INDEX_RUN_PREFIX}{manifest.get('next_run', 0)}.bin"
+                self._write_index(self._index_path(run_name), new_run)
+                runs = runs + [run_name]
+                manifest["next_run"] = manifest.get("next_run", 0) + 1
+            if len(runs) > Config.INDEX_MAX_RUNS:
+                self._write_index(f"{index_path}.tmp", heapq.merge(*existing.segments(), new_run), replace=False)
+                existing.close()  # Windows下被映射的文件无法替换，须先释放
+                os.replace(f"{index_path}.tmp", index_path)
+                runs = []
+                self._remove_stale_runs(runs)
+                logger.info(f"🗂️ 索引增量段已归并: {count} 条")
+            existing.close()
+            logger.info(f"🗂️ 索引增量更新完成: 变更分片 {len(changed)} 个 | 新增 {len(new_run)} 条")
+
+        # 索引内容每次变化都生成新的代号，布隆过滤器记录其对应的代号用于校验
+        generation = previous_generation
+        if full_rebuild or new_run or previous_generation is None:
+            generation = int.from_bytes(os.urandom(8), "little")
+        if full_rebuild or changed or generation != previous_generation:
+            self._write_manifest(manifest_path, {
+                "byteorder": sys.byteorder,
+                "count": count,
+                "shards": current,
+                "runs": runs,
+                "next_run": manifest.get("next_run", 0) if manifest and not full_rebuild else 0,
+                "generation": generation
+            })
+
+        index = ProcessedIndex(index_path, [self._index_path(run) for run in runs])
+        if Config.BLOOM_ENABLED:
+            new_runs = None if full_rebuild else [new_run] if new_run else []
+            index.bloom = self._sync_bloom(index, new_runs, previous_generation, generation)
+        logger.info(f"🔍 已加载历史条目索引: {len(index)}")
+        return index
+
+    def _iter_hashes(self, names):
+        """逐条产出指定分片中条目的哈希"""
+        for name in names:
+            path = os.path.join(Config.SHARD_DIR, name)
+            if name.endswith(Config.SHARD_LOG_SUFFIX):
+                entries = self._read_log(path)
+            else:
+                entries = self._read_json_shard(path) or []
+            for entry_id in entries:
+                yield ProcessedIndex.hash_id(entry_id)
+
+    @staticmethod
+    def _iter_unique(hashes):
+        """有序哈希去重"""
+        last = None
+        for h in hashes:
+            if h != last:
+                yield h
+                last = h
+
+    @staticmethod
+    def _index_path(name):
+        return os.path.join(Config.SHARD_DIR, name)
+
+    def _write_index(self, path, hashes, replace=True):
+        """将有序哈希写入索引文件（归并输入时同时去重），返回条目数"""
+        tmp_path = f"{path}.tmp" if replace else path
+        count = 0
+        buffer = array("Q")
+        with open(tmp_path, "wb") as f:
+            for h in self._iter_unique(hashes):
+                buffer.append(h)
+                if len(buffer) >= 65536:
+                    buffer.tofile(f)
+                    count += len(buffer)
+                    buffer = array("Q")
+            buffer.tofile(f)
+            count += len(buffer)
+            f.flush()
+            os.fsync(f.fileno())
+        if replace:
+            os.replace(tmp_path, path)
+        return count
+
+    @staticmethod
+    def _write_manifest(path, manifest):
+        """原子写入索引清单"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _remove_stale_runs(runs):
+        """删除清单外遗留的增量段文件"""
+        keep = set(runs)
+        for name in os.listdir(Config.SHARD_DIR):
+            if name.startswith(Config.INDEX_RUN_PREFIX) and name.endswith(".bin") and name not in keep:
+                os.remove(os.path.join(Config.SHARD_DIR, name))
+
+    def _sync_bloom(self, index, new_runs, previous_generation, generation):
+        """同步布隆过滤器：增量加入新哈希，缺失/与索引代号不符/参数变更/容量不足时由索引重建
+
+        new_runs 为本次新增且此前不在索引中的哈希（全量重建时为None）。
+        过滤器须与加入新哈希前的索引同代才能增量更新，否则（如写入索引后、保存过滤器前中断，
+        或曾在关闭布隆过滤器时更新过索引）由索引整体重建，避免以过期过滤器误判条目未处理。
+        """
+        bloom_path = os.path.join(Config.SHARD_DIR, Config.BLOOM_FILE)
+        bloom = BloomFilter.load(bloom_path)
+        added = sum(len(run) for run in new_runs) if new_runs else 0
+
+        if (
+                bloom is None
+                or new_runs is None
+                or bloom.generation != (previous_generation if added else generation)
+                or bloom.fp_rate != Config.BLOOM_FP_RATE
+                or bloom.count + added > bloom.capacity
+        ):
+            capacity = max(Config.BLOOM_MIN_CAPACITY, len(index) * 2)
+            bloom = BloomFilter.create(capacity, Config.BLOOM_FP_RATE)
+            for h in index:
+                bloom.add(h)
+            bloom.generation = generation
+            bloom.save(bloom_path)
+            logger.info(f"🌸 布隆过滤器已重建: 容量 {capacity} | 误判率 {Config.BLOOM_FP_RATE}")
+        elif added:
+            for run in new_runs:
+                for h in run:
+                    bloom.add(h)
+            bloom.generation = generation
+            bloom.save(bloom_path)
+            logger.debug(f"🌸 布隆过滤器增量更新: {added}")
+        return bloom
+
+    @staticmethod
+    def _load_index_manifest(path):
+        """读取索引清单，缺失或损坏时返回None"""
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    @staticmethod
+    def _shard_stem(name):
+        """去除分片后缀（.json/.jsonl）"""
+        return name.split(".")[0]
+
+
+# --------------------
+# 布隆过滤器
+# --------------------
+class BloomFilter:
+    """持久化布隆过滤器（基于条目64位哈希做双重哈希）
+
+    仅作为索引前的预筛：判定不存在即一定不存在，判定存在时再查精确索引。
+    文件可随时删除，下次加载索引时会由分片索引自动重建。
+    """
+
+    MAGIC = b"XBF2"
+    HEADER = struct.Struct("<4sQIQQdQ")  # magic, 位数, 哈希次数, 容量, 已加入数, 误判率, 对应索引代号
+
+    def __init__(self, num_bits, num_hashes, capacity, fp_rate, count=0, bits=None, generation=0):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.count = count
+        self.generation = generation
+        self.bits = bits if bits is not None else bytearray((num_bits + 7) // 8)
+
+    @classmethod
+    def create(cls, capacity, fp_rate):
+        """按容量与误判率计算最优参数"""
+        num_bits = max(8, math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(num_bits, num_hashes, capacity, fp_rate)
+
+    @classmethod
+    def load(cls, path):
+        """加载过滤器文件，缺失或损坏时返回None"""
+        try:
+            with open(path, "rb") as f:
+                header = f.read(cls.HEADER.size)
+                magic, num_bits, num_hashes, capacity, count, fp_rate, generation = cls.HEADER.unpack(header)
+                bits = bytearray(f.read())
+        except (OSError, struct.error):
+            return None
+        if magic != cls.MAGIC or len(bits) != (num_bits + 7) // 8:
+            logger.warning(f"⚠️ 布隆过滤器文件无效，将重建: {path}")
+            return None
+        return cls(num_bits, num_hashes, capacity, fp_rate, count, bits, generation)
+
+    def save(self, path):
+        """原子写入过滤器文件"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.HEADER.pack(
+                self.MAGIC, self.num_bits, self.num_hashes, self.capacity, self.count, self.fp_rate,
+                self.generation
+            ))
+            f.write(self.bits)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _positions(self, h):
+        """双重哈希生成比特位置"""
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, h):
+        for pos in self._positions(h):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, h):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(h))
+
+
+# --------------------
+# 已处理条目索引
+# --------------------
+class ProcessedIndex:
+    """已处理条目的只读持久化索引
+
+    文件内容为有序的64位哈希数组（本机字节序），通过mmap映射后二分查找，
+    无需在内存中构建完整的字符串集合。本次运行新增的条目记录在内存中。
+    配置布隆过滤器后先行预筛，仅可能命中的条目才进入二分查找。
+    64位哈希在千万级条目下的碰撞概率可忽略不计。
+    """
+
+    def __init__(self, path, run_paths=()):
+        self._files = []
+        self._mmaps = []
+        self._segments = []  # 主索引与各增量段的有序哈希视图
+        self._added = set()  # 本次运行新增条目的哈希
+        self.bloom = None  # 可选的布隆过滤器预筛
+
+        for segment_path in [path, *run_paths]:
+            if os.path.exists(segment_path) and os.path.getsize(segment_path) > 0:
+                f = open(segment_path, "rb")
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._files.append(f)
+                self._mmaps.append(mapped)
+                self._segments.append(memoryview(mapped).cast("Q"))
+
+    @staticmethod
+    def hash_id(entry_id):
+        """计算条目ID的64位哈希"""
+        return int.from_bytes(hashlib.blake2b(entry_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+    def __contains__(self, entry_id):
+        h = self.hash_id(entry_id)
+        if h in self._added:
+            return True
+        if self.bloom is not None and h not in self.bloom:
+            return False
+        return self.contains_hash(h)
+
+    def contains_hash(self, h):
+        """在主索引与增量段中二分查找哈希（不经布隆过滤器）"""
+        for hashes in self._segments:
+            pos = bisect.bisect_left(hashes, h)
+            if pos < len(hashes) and hashes[pos] == h:
+                return True
+        return False
+
+    def __len__(self):
+        return sum(len(hashes) for hashes in self._segments) + len(self._added)
+
+    def __iter__(self):
+        """按序遍历索引中的哈希（各段间互不重复）"""
+        return heapq.merge(*self._segments)
+
+    def segments(self):
+        """各段的有序哈希视图（供归并使用）"""
+        return list(self._segments)
+
+    def add(self, entry_id):
+        """记录本次运行新增的条目"""
+        self._added.add(self.hash_id(entry_id))
+
+    def update(self, entry_ids):
+        """批量记录本次运行新增的条目"""
+        for entry_id in entry_ids:
+            self.add(entry_id)
+
+    def close(self):
+        """释放mmap映射"""
+        for hashes in self._segments:
+            hashes.release()
+        for mapped in self._mmaps:
+            mapped.close()
+        for f in self._files:
+            f.close()
+        self._segments, self._mmaps, self._files = [], [], []
+
 
 # --------------------
 # 条目处理器
@@ -210,27 +760,31 @@ class EntryProcessor:
 
     def process_entry(self, entry, user_info, processed_ids):
         """处理单个推文条目"""
-        new_entries = []
+        return [
+            self.build_entry(entry, user_info, media_type, filename, url)
+            for media_type, filename, url in self.iter_new_media(entry, user_info, processed_ids)
+        ]
 
+    def iter_new_media(self, entry, user_info, processed_ids):
+        """逐个产出条目中未处理过的媒体 (media_type, filename, url)"""
         # 处理普通媒体
-        new_entries.extend(self._process_media(entry, user_info, processed_ids, "images"))
-        new_entries.extend(self._process_media(entry, user_info, processed_ids, "videos"))
+        yield from self._process_media(entry, user_info, processed_ids, "images")
+        yield from self._process_media(entry, user_info, processed_ids, "videos")
 
         # 处理特殊链接
-        new_entries.extend(self._process_special_urls(entry, user_info, processed_ids))
-
-        # 补充元数据
-        for e in new_entries:
-            e.update({
-                "full_text": entry.get("full_text", ""),
-                "publish_time": entry.get("publish_time", "")
-            })
+        yield from self._process_special_urls(entry, user_info, processed_ids)
 
-        return new_entries
+    def build_entry(self, entry, user_info, media_type, filename, url):
+        """生成补充了推文元数据的输出条目"""
+        new_entry = self.create_entry_template(filename, user_info, media_type, url)
+        new_entry.update({
+            "full_text": entry.get("full_text", ""),
+            "publish_time": entry.get("publish_time", "")
+        })
+        return new_entry
 
     def _process_media(self, entry, user_info, processed_ids, media_type):
         """处理图片/视频类媒体"""
-        entries = []
         for url in entry.get(media_type, []):
             filename = self._extract_filename(url)
             entry_id = self.generate_entry_id(filename, user_info["screen_name"], media_type)
@@ -238,15 +792,11 @@ class EntryProcessor:
             if entry_id in processed_ids:
                 continue
 
-            new_entry = self.create_entry_template(filename, user_info, media_type, url)
-            entries.append(new_entry)
             logger.debug(f"📷 发现新{media_type}条目: {filename}")
-
-        return entries
+            yield media_type, filename, url
 
     def _process_special_urls(self, entry, user_info, processed_ids):
         """处理广播/空间链接"""
-        entries = []
         for url in entry.get("expand_urls", []):
             media_type = self._detect_media_type(url)
             if not media_type:
@@ -258,11 +808,8 @@ class EntryProcessor:
             if entry_id in processed_ids:
                 continue
 
-            new_entry = self.create_entry_template(filename, user_info, media_type, url)
-            entries.append(new_entry)
             logger.debug(f"🔗 发现特殊链接: {media_type} - {filename}")
-
-        return entries
+            yield media_type, filename, url
 
     @staticmethod
     def _extract_filename(url):
@@ -301,6 +848,72 @@ class FileManager:
             raise
 
     @staticmethod
+    def iter_json_array(path):
+        """流式读取JSON数组，逐个产出元素（安装ijson时使用ijson）"""
+        try:
+            if ijson is not None:
+                with open(path, "rb") as f:
+                    yield from ijson.items(f, "item", use_float=True)
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    yield from FileManager._iter_array_fallback(f)
+            logger.info(f"📂 成功加载文件: {path}")
+        except FileNotFoundError:
+            logger.error(f"❌ 文件未找到: {path}")
+            raise
+        except JSON_STREAM_ERRORS:
+            logger.error(f"❌ JSON解析失败: {path}")
+            raise
+
+    @staticmethod
+    def _iter_array_fallback(f):
+        """纯Python流式解析：按块读取并用raw_decode逐个解码数组元素"""
+        decoder = json.JSONDecoder()
+        buffer, pos, eof = "", 0, False
+        started = False
+
+        while True:
+            # 跳过空白，缓冲区耗尽时继续读取
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos >= len(buffer):
+                if eof:
+                    raise json.JSONDecodeError("JSON数组未闭合", buffer, pos)
+                chunk = f.read(Config.STREAM_CHUNK_SIZE)
+                buffer, pos, eof = chunk, 0, not chunk
+                continue
+
+            char = buffer[pos]
+            if not started:
+                if char != "[":
+                    raise json.JSONDecodeError("顶层结构不是JSON数组", buffer, pos)
+                started = True
+                pos += 1
+                continue
+            if char == "]":
+                return
+            if char == ",":
+                pos += 1
+                continue
+
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = None
+
+            # 元素不完整，或其后尚未读到分隔符（数字可能被块边界截断）时补充读取后重试
+            if not eof and (end is None or end == len(buffer) or buffer[end] not in " \t\r\n,]"):
+                chunk = f.read(Config.STREAM_CHUNK_SIZE)
+                buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+                continue
+
+            yield item
+            pos = end
+
+    @staticmethod
+    @metrics.timed("xbot.save_output")
     def save_output(data, output_path):
         """保存输出文件"""
         output_dir = os.path.dirname(output_path)
@@ -308,8 +921,13 @@ class FileManager:
             os.makedirs(output_dir)
             logger.info(f"📁 创建输出目录: {output_dir}")
 
-        with open(output_path, "w", encoding="utf-8") as f:
+        # 先写临时文件再重命名，避免中断时留下半写的输出文件
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, output_path)
         logger.info(f"💾 输出已保存至: {output_path}")
 
 
@@ -319,106 +937,252 @@ class FileManager:
 class XBotCore:
     """主处理逻辑"""
 
-    def __init__(self):
+    def __init__(self, load_index=True):
         self.shard_manager = ShardManager()
         self.entry_processor = EntryProcessor()
         self.file_manager = FileManager()
-        self.processed_ids = self.shard_manager.load_processed_entries()
+        # 工作进程只做解析与批内去重，无需加载历史索引
+        self.processed_ids = self.shard_manager.load_processed_index() if load_index else set()
 
+    def close(self):
+        """释放分片日志与索引映射（进程内复用结束时调用）"""
+        self.shard_manager.close()
+        if isinstance(self.processed_ids, ProcessedIndex):
+            self.processed_ids.close()
+
+    @metrics.timed("xbot.process_single_day")
     def process_single_day(self, data_path, output_path):
-        """处理单日数据"""
+        """处理单日数据：读取 → 规范化 → 去重 → 补全 → 写入分片/输出"""
         logger.info(f"\n{'-' * 40}\n🔍 开始处理: {os.path.basename(data_path)}")
 
-        # 加载数据
-        raw_data = self.file_manager.load_json(data_path)
-        user_data = self._organize_user_data(raw_data)
-
-        # 处理条目
-        all_new_entries = []
-        # 遍历所有用户
-        for username in user_data:
-
-            user_info = user_data[username]
-
-            user_entries = []
-            for entry in user_info["entries"]:
-                user_entries.extend(self.entry_processor.process_entry(entry, user_info, self.processed_ids))
-
-            # 保存新条目ID
-            for entry in user_entries:
-                entry_id = EntryProcessor.generate_entry_id(
-                    entry["file_name"],
-                    entry["user"]["screen_name"],
-                    entry["media_type"]
-                )
-                self.shard_manager.save_entry_id(entry_id)
-
-            all_new_entries.extend(user_entries)
-
-        # 合并输出
-        final_output = self._merge_output(output_path, all_new_entries)
-        self.file_manager.save_output(final_output, output_path)
-        logger.info(f"🎉 本日处理完成！新增条目: {len(all_new_entries)}\n{'-' * 40}\n")
-        return len(all_new_entries)
-
-    def _organize_user_data(self, raw_data):
-        """重组用户数据结构"""
-        organized = {}
-        for item in raw_data:
-            user = item.get("user", {})
-            username = user.get("screenName")
-            if not username:
+        # 各阶段均为惰性生成器，由输出写入端单次驱动
+        users = {}
+        items = self._read_stage(data_path)
+        normalized = self._normalize_stage(items, users)
+        media = self._dedup_stage(normalized, self.processed_ids)
+        entries = self._enrich_stage(media)
+        new_count = self._output_sink(self._shard_sink(entries), output_path, users)
+
+        logger.info(f"🎉 本日处理完成！新增条目: {new_count}\n{'-' * 40}\n")
+        return new_count
+
+    def collect_candidates(self, data_path):
+        """解析数据文件，返回批内去重后的候选条目及用户首次出现顺序（不查历史索引）"""
+        users = {}
+        normalized = self._normalize_stage(self._read_stage(data_path), users)
+        candidates = list(self._enrich_stage(self._dedup_stage(normalized, set())))
+        return candidates, list(users)
+
+    @metrics.timed("xbot.commit_candidates")
+    def commit_candidates(self, data_path, candidates, user_order, output_path):
+        """协调端：对候选条目做全局去重，再写入分片与输出"""
+        logger.info(f"\n{'-' * 40}\n🔍 开始提交: {os.path.basename(data_path)} (候选条目: {len(candidates)})")
+        users = dict.fromkeys(user_order)
+        entries = self._filter_processed(candidates)
+        new_count = self._output_sink(self._shard_sink(entries), output_path, users)
+        logger.info(f"🎉 本日处理完成！新增条目: {new_count}\n{'-' * 40}\n")
+        return new_count
+
+    def _filter_processed(self, entries):
+        """按历史索引过滤已处理条目，并即时登记"""
+        for entry in entries:
+            entry_id = self._get_entry_id(entry)
+            if entry_id in self.processed_ids:
                 continue
+            self.processed_ids.add(entry_id)
+            yield entry
+
+    def _read_stage(self, data_path):
+        """读取阶段：流式产出原始推文"""
+        return self.file_manager.iter_json_array(data_path)
+
+    def _normalize_stage(self, items, users):
+        """规范化阶段：产出 (用户信息, 条目)"""
+        for item in items:
+            normalized = self._normalize_item(item, users)
+            if normalized is not None:
+                yield normalized
+
+    def _dedup_stage(self, normalized, seen):
+        """去重阶段：产出未处理过的媒体，并即时登记以过滤同批次重复"""
+        for user_info, entry in normalized:
+            for media_type, filename, url in self.entry_processor.iter_new_media(entry, user_info, seen):
+                seen.add(EntryProcessor.generate_entry_id(filename, user_info["screen_name"], media_type))
+                yield user_info, entry, media_type, filename, url
+
+    def _enrich_stage(self, media):
+        """补全阶段：生成完整的输出条目"""
+        for user_info, entry, media_type, filename, url in media:
+            yield self.entry_processor.build_entry(entry, user_info, media_type, filename, url)
+
+    def _shard_sink(self, entries):
+        """分片写入端：透传条目，输入耗尽后一次性提交本批ID（每个分片仅写入一次）"""
+        new_ids = []
+        for entry in entries:
+            new_ids.append(self._get_entry_id(entry))
+            yield entry
+        self.shard_manager.save_entry_ids(new_ids)
+
+    def _output_sink(self, entries, output_path, users):
+        """输出写入端：按发布时间与用户首次出现顺序排列后合并保存"""
+        new_entries = list(entries)
+
+        # 与按用户分组后再按发布时间稳定排序的结果一致
+        user_ranks = {username: rank for rank, username in enumerate(users)}
+        new_entries.sort(key=lambda e: (self._sort_key(e), user_ranks[e["user"]["screen_name"]]))
+
+        final_output = self._merge_output(output_path, new_entries)
+        self.file_manager.save_output(final_output, output_path)
+        return len(new_entries)
 
-            if username not in organized:
-                organized[username] = {
-                    "screen_name": username,
-                    "name": user.get("name", "N/A"),
-                    "entries": []
-                }
-
-            organized[username]["entries"].append({
-                "full_text": item.get("fullText", ""),
-                "publish_time": item.get("publishTime", ""),
-                "images": item.get("images", []),
-                "videos": item.get("videos", []),
-                "expand_urls": item.get("expandUrls", [])
-            })
-        return organized
+    @staticmethod
+    def _normalize_item(item, users):
+        """规范化单条原始推文，返回(用户信息, 条目)；users记录首次出现的用户信息"""
+        user = item.get("user", {})
+        username = user.get("screenName")
+        if not username:
+            return None
+
+        if username not in users:
+            users[username] = {
+                "screen_name": username,
+                "name": user.get("name", "N/A")
+            }
+
+        return users[username], {
+            "full_text": item.get("fullText", ""),
+            "publish_time": item.get("publishTime", ""),
+            "images": item.get("images", []),
+            "videos": item.get("videos", []),
+            "expand_urls": item.get("expandUrls", [])
+        }
 
+    @metrics.timed("xbot.merge_output")
     def _merge_output(self, output_path, new_entries):
-        """合并新旧输出文件"""
+        """合并新旧输出文件（已有文件有序时仅对新增条目排序后线性归并）"""
         existing = []
         if os.path.exists(output_path):
             existing = self.file_manager.load_json(output_path)
             logger.info(f"🔄 合并现有输出文件，已有条目: {len(existing)}")
 
         existing_ids = {self._get_entry_id(e) for e in existing}
-        merged = existing.copy()
-        added = 0
+        additions = [e for e in new_entries if self._get_entry_id(e) not in existing_ids]
+        added = len(additions)
 
-        for entry in new_entries:
-            entry_id = self._get_entry_id(entry)
-            if entry_id not in existing_ids:
-                merged.append(entry)
-                added += 1
+        # 稳定排序 + 稳定归并，结果与整体重排完全一致
+        additions.sort(key=self._sort_key)
+        if Config.INCREMENTAL_MERGE and self._is_sorted(existing):
+            merged = list(heapq.merge(existing, additions, key=self._sort_key))
+        else:
+            merged = existing + additions
+            merged.sort(key=self._sort_key)
 
-        merged.sort(key=lambda x: x.get("publish_time", ""))
         logger.info(f"🆕 新增条目: {added} | 合并后总数: {len(merged)}")
+        metrics.incr("xbot.new_entries", added)
+        metrics.observe("xbot.output_entries", len(merged))
         return merged
 
+    @staticmethod
+    def _sort_key(entry):
+        """输出文件排序键"""
+        return entry.get("publish_time", "")
+
+    @classmethod
+    def _is_sorted(cls, entries):
+        """检查条目是否已按发布时间有序"""
+        return all(
+            cls._sort_key(entries[i]) <= cls._sort_key(entries[i + 1])
+            for i in range(len(entries) - 1)
+        )
+
     @staticmethod
     def _get_entry_id(entry):
         """获取条目唯一标识"""
         return f"{entry['file_name']}_{entry['user']['screen_name']}_{entry['media_type']}"
 
 
+# --------------------
+# 进程内调用接口
+# --------------------
+def daily_output_path(current_date=None):
+    """单文件模式的输出路径：当天输出目录（与数据文件日期无关）"""
+    current_date = current_date or datetime.now()
+    output_dir = os.path.normpath(
+        f"{Config.DEFAULT_OUTPUT_DIR}{current_date.strftime(Config.YEAR_MONTH)}/"
+    )
+    return os.path.join(output_dir, f"{current_date.strftime(Config.YEAR_MONTH_DAY)}.json")
+
+
+def process_file(core, data_path, output_path=None):
+    """处理单个数据文件并返回结构化结果，供其他脚本复用同一 XBotCore
+
+    返回 {"data_path", "output_path", "new_count", "skipped"}，
+    未指定 output_path 时写入当天输出文件。
+    """
+    data_path = os.path.normpath(data_path)
+    output_path = os.path.normpath(output_path) if output_path else daily_output_path()
+    result = {"data_path": data_path, "output_path": output_path, "new_count": 0, "skipped": True}
+
+    if not os.path.exists(data_path):
+        logger.info(f"⏭️ 跳过不存在的数据文件：{data_path}")
+        return result
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    result["new_count"] = core.process_single_day(data_path, output_path)
+    result["skipped"] = False
+    return result
+
+
+def commit_file(core, data_path, candidates, user_order, output_path=None):
+    """提交工作进程解析出的候选条目（见 collect_day_candidates），返回结构同 process_file"""
+    data_path = os.path.normpath(data_path)
+    output_path = os.path.normpath(output_path) if output_path else daily_output_path()
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    new_count = core.commit_candidates(data_path, candidates, user_order, output_path)
+    return {"data_path": data_path, "output_path": output_path, "new_count": new_count, "skipped": False}
+
+
+# --------------------
+# 多进程处理
+# --------------------
+def collect_day_candidates(data_path):
+    """工作进程任务：解析单日数据，返回候选条目与用户顺序"""
+    return XBotCore(load_index=False).collect_candidates(data_path)
+
+
+def process_days_parallel(core, day_tasks, workers):
+    """多进程解析各日数据，由当前进程按日期顺序统一去重并写入分片/输出"""
+    logger.info(f"⚙️ 并行模式：{len(day_tasks)} 个数据文件，{workers} 个工作进程")
+    # 使用spawn启动工作进程：fork会复制已启动线程持有的锁状态，可能导致子进程死锁
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [executor.submit(collect_day_candidates, data_path) for data_path, _ in day_tasks]
+        # 按日期顺序提交，保证与串行处理一致：较早日期优先占用条目ID
+        for (data_path, output_path), future in zip(day_tasks, futures):
+            candidates, user_order = future.result()
+            core.commit_candidates(data_path, candidates, user_order, output_path)
+
+
+def pop_workers_arg(args):
+    """解析并移除 --workers N 参数，默认单进程"""
+    if "--workers" not in args:
+        return 1
+    pos = args.index("--workers")
+    try:
+        workers = int(args[pos + 1])
+    except (IndexError, ValueError):
+        logger.error("❗ --workers 需要指定正整数进程数")
+        sys.exit(1)
+    del args[pos:pos + 2]
+    return max(1, workers)
+
+
 # --------------------
 # 命令行接口
 # --------------------
 def main():
     core = XBotCore()
     args = sys.argv[1:]  # 获取命令行参数
+    workers = pop_workers_arg(args)
 
     # 指定输出目录：python X-Bot.py 数据文件 输出文件
     if len(args) == 2:
@@ -434,30 +1198,18 @@ def main():
     # 单参数模式：python X-Bot.py 数据文件
     elif len(args) == 1:
         data_path = os.path.normpath(args[0])
-        current_date = datetime.now()
-
-        # 生成当天输出路径（与数据文件日期无关）
-        output_dir = os.path.normpath(
-            f"{Config.DEFAULT_OUTPUT_DIR}{current_date.strftime(Config.YEAR_MONTH)}/"
-        )
-        output_filename = f"{current_date.strftime(Config.YEAR_MONTH_DAY)}.json"
-        output_path = os.path.join(output_dir, output_filename)
-
         if os.path.exists(data_path):
             logger.info(f"⚡ 单文件模式处理：{os.path.basename(data_path)}")
-            os.makedirs(output_dir, exist_ok=True)
-            new_entries_count = core.process_single_day(data_path, output_path)
-            # 返回新增条数
-            print(new_entries_count)
-        else:
-            logger.info(f"⏭️ 跳过不存在的数据文件：{data_path}")
-            print(0)
+
+        # 输出到当天文件并返回新增条数
+        print(process_file(core, data_path)["new_count"])
 
     # 无参数模式：python X-Bot.py
     elif len(args) == 0:
         current_date = datetime.now()
 
         logger.info("🤖 自动模式：处理最近一周数据")
+        day_tasks = []
         for day_offset in reversed(range(8)):  # 包含今天共8天
             target_date = current_date - timedelta(days=day_offset)
 
@@ -475,23 +1227,30 @@ def main():
             output_path = os.path.join(output_dir, data_filename)
 
             if os.path.exists(data_path):
-                logger.info(f"🔍 正在处理 {target_date.strftime(Config.YEAR_MONTH_DAY)} 数据...")
                 os.makedirs(output_dir, exist_ok=True)
-                core.process_single_day(data_path, output_path)
+                day_tasks.append((data_path, output_path))
             else:
                 logger.info(f"⏭️ 跳过不存在的数据文件：{data_filename}")
 
+        if workers > 1 and len(day_tasks) > 1:
+            process_days_parallel(core, day_tasks, workers)
+        else:
+            for data_path, output_path in day_tasks:
+                logger.info(f"🔍 正在处理 {os.path.basename(data_path)[:-5]} 数据...")
+                core.process_single_day(data_path, output_path)
+
     # 错误参数处理
     else:
         logger.error("❗ 参数错误！支持以下模式：")
         logger.info("1. 全参数模式：脚本 + 数据文件 + 输出文件")
         logger.info("2. 单文件模式：脚本 + 数据文件（输出到当天目录）")
-        logger.info("3. 自动模式：仅脚本（处理最近一周数据）")
+        logger.info("3. 自动模式：仅脚本（处理最近一周数据，可加 --workers N 多进程并行）")
         logger.info("示例：")
         logger.info(
             "python X-Bot.py ../../TypeScript/tweets/2000-01/2000-01-01.json ../output/2000-01/2000-01-01.json")
         logger.info("python X-Bot.py ../../TypeScript/tweets/user/xxx.json")
         logger.info("python X-Bot.py")
+        logger.info("python X-Bot.py --workers 4")
         sys.exit(1)
 
 
@@ -505,3 +1264,5 @@ if __name__ == "__main__":
     except Exception as e:
         logger.error(f"💥 未处理的异常: {str(e)}")
         sys.exit(1)
+    finally:
+        logger.info(f"📊 运行指标已写入: {metrics.write_report('X-Bot', Config.DEFAULT_LOG_DIR)}")
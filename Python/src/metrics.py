@@ -0,0 +1,127 @@
+"""
+运行指标采集 (计时器 / 计数器 / 直方图)
+
+X-Bot、T-Bot、INI-XT-Bot 共用的轻量指标模块：
+- timer / timed：记录耗时(秒)，被包装函数抛出异常时额外计数 <名称>.errors
+- incr：累加计数器
+- observe：记录任意数值分布 (如文件大小)
+- write_report：运行结束时将汇总结果写入日志目录下的 metrics-<脚本名>-<时间>.json
+
+同一进程内所有脚本共享一个注册表，INI-XT-Bot 进程内调用 X-Bot 时指标合并到同一份报告。
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class Metrics:
+    """线程安全的指标注册表"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started_at = datetime.now()
+        self._counters = {}
+        self._timers = {}
+        self._histograms = {}
+
+    def incr(self, name, value=1):
+        """累加计数器"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        """记录直方图样本"""
+        with self._lock:
+            self._histograms.setdefault(name, []).append(value)
+
+    def record_time(self, name, seconds):
+        """记录一次耗时样本"""
+        with self._lock:
+            self._timers.setdefault(name, []).append(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        """计时上下文：with metrics.timer("xbot.merge"): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.incr(f"{name}.errors")
+            raise
+        finally:
+            self.record_time(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """计时装饰器"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """当前指标汇总"""
+        with self._lock:
+            return {
+                "started_at": self._started_at.strftime("%Y-%m-%dT%H:%M:%S"),
+                "finished_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+                "counters": dict(self._counters),
+                "timers": {name: self._summarize(samples) for name, samples in self._timers.items()},
+                "histograms": {name: self._summarize(samples) for name, samples in self._histograms.items()}
+            }
+
+    def write_report(self, script, log_dir="../logs/"):
+        """将指标汇总写入日志目录，返回报告路径"""
+        os.makedirs(log_dir, exist_ok=True)
+        report = {"script": script, "pid": os.getpid(), **self.snapshot()}
+        filename = f"metrics-{script}-{self._started_at.strftime('%Y-%m-%d_%H%M%S')}-{os.getpid()}.json"
+        path = os.path.join(log_dir, filename)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return path
+
+    def reset(self):
+        """清空所有指标"""
+        with self._lock:
+            self._started_at = datetime.now()
+            self._counters.clear()
+            self._timers.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _summarize(samples):
+        """样本统计：次数、总和、极值、均值与分位数"""
+        ordered = sorted(samples)
+        count = len(ordered)
+
+        def percentile(p):
+            return ordered[min(count - 1, int(p * count))]
+
+        return {
+            "count": count,
+            "sum": round(sum(ordered), 6),
+            "min": round(ordered[0], 6),
+            "max": round(ordered[-1], 6),
+            "mean": round(sum(ordered) / count, 6),
+            "p50": round(percentile(0.50), 6),
+            "p90": round(percentile(0.90), 6),
+            "p99": round(percentile(0.99), 6)
+        }
+
+
+# 进程内共享注册表
+registry = Metrics()
+
+incr = registry.incr
+observe = registry.observe
+timer = registry.timer
+timed = registry.timed
+snapshot = registry.snapshot
+write_report = registry.write_report
+reset = registry.reset
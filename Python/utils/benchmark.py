@@ -0,0 +1,356 @@
+"""
+X-Bot / T-Bot 热点路径基准测试
+
+在临时目录中生成与 TypeScript/tweets 相同结构 (fullText/images/videos/expandUrls) 的合成时间线、
+已处理分片历史与已有输出文件，逐阶段计时后将结果保存为JSON (附带当前提交哈希)，便于跨提交对比。
+
+用法：
+    python benchmark.py                              # 默认规模：1万条推文、10万条分片历史
+    python benchmark.py --tweets 1000000 --history 5000000 --repeat 3
+    python benchmark.py --compare ../logs/benchmark-xxx.json   # 与历史结果对比
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "../src"))
+DEFAULT_RESULTS_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "../logs"))
+
+
+# --------------------
+# 合成数据
+# --------------------
+class SyntheticData:
+    """按固定随机种子生成合成推文与条目，保证同参数下各次运行数据一致"""
+
+    def __init__(self, users, seed, dup_rate):
+        self.rng = random.Random(seed)
+        self.users = [f"bench_user_{i}" for i in range(users)]
+        self.dup_rate = dup_rate
+        self.start = datetime(2025, 1, 1)
+        self._media_seq = 0
+        self.history_media = []  # 已写入分片历史的 (文件名, 用户, 类型)
+
+    def _next_media(self, media_type):
+        """生成新的媒体URL"""
+        self._media_seq += 1
+        if media_type == "videos":
+            return f"https://video.twimg.com/ext_tw_video/{self._media_seq:012d}.mp4?tag=12"
+        return f"https://pbs.twimg.com/media/B{self._media_seq:012d}.jpg"
+
+    def _repost(self):
+        """复用一条历史媒体，模拟已处理过的重复条目"""
+        filename, screen_name, media_type = self.rng.choice(self.history_media)
+        if media_type == "videos":
+            return screen_name, [], [f"https://video.twimg.com/ext_tw_video/{filename}"]
+        return screen_name, [f"https://pbs.twimg.com/media/{filename}"], []
+
+    def history_ids(self, count):
+        """生成分片历史条目ID"""
+        for _ in range(count):
+            self._media_seq += 1
+            screen_name = self.rng.choice(self.users)
+            media_type = "videos" if self.rng.random() < 0.2 else "images"
+            filename = f"H{self._media_seq:012d}.{'mp4' if media_type == 'videos' else 'jpg'}"
+            if len(self.history_media) < 100000:
+                self.history_media.append((filename, screen_name, media_type))
+            yield f"{filename}_{screen_name}_{media_type}"
+
+    def tweets(self, count):
+        """生成原始推文 (TypeScript/tweets 结构)"""
+        for i in range(count):
+            expand_urls = []
+            if self.history_media and self.rng.random() < self.dup_rate:
+                screen_name, images, videos = self._repost()
+            else:
+                screen_name = self.rng.choice(self.users)
+                images = [self._next_media("images") for _ in range(self.rng.choice((0, 1, 1, 2, 4)))]
+                videos = [self._next_media("videos")] if self.rng.random() < 0.15 else []
+            if self.rng.random() < 0.02:
+                kind = self.rng.choice(("broadcasts", "spaces"))
+                expand_urls.append(f"https://x.com/i/{kind}/{self.rng.getrandbits(48):x}")
+            yield {
+                "user": {"screenName": screen_name, "name": screen_name.upper()},
+                "images": images,
+                "videos": videos,
+                "expandUrls": expand_urls,
+                "tweetUrl": f"https://x.com/{screen_name}/status/{10 ** 18 + i}",
+                "fullText": "benchmark " * self.rng.randint(1, 30),
+                "publishTime": (self.start + timedelta(seconds=self.rng.randint(0, 86399))).strftime("%Y-%m-%dT%H:%M:%S")
+            }
+
+    def output_entries(self, count, uploaded_rate=0.8):
+        """生成输出/推送条目 (X-Bot输出、T-Bot输入结构)，按发布时间有序"""
+        entries = []
+        for i in range(count):
+            screen_name = self.rng.choice(self.users)
+            uploaded = self.rng.random() < uploaded_rate
+            entries.append({
+                "file_name": f"O{i:012d}.jpg",
+                "user": {"screen_name": screen_name, "name": screen_name.upper()},
+                "media_type": "images",
+                "url": f"https://pbs.twimg.com/media/O{i:012d}.jpg",
+                "read_time": "2025-01-01 00:00:00",
+                "is_uploaded": uploaded,
+                "upload_info": {"success": True, "message_id": f"m{i}"} if uploaded else {},
+                "is_downloaded": uploaded,
+                "download_info": {},
+                "full_text": "benchmark",
+                "publish_time": (self.start + timedelta(seconds=i % 86400)).strftime("%Y-%m-%dT%H:%M:%S")
+            })
+        entries.sort(key=lambda e: e["publish_time"])
+        return entries
+
+
+def write_json_array(path, items):
+    """流式写出JSON数组，避免大规模数据整体驻留内存"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, item in enumerate(items):
+            if i:
+                f.write(",\n")
+            f.write(json.dumps(item, ensure_ascii=False))
+        f.write("]")
+
+
+# --------------------
+# 计时工具
+# --------------------
+class Bench:
+    """记录各阶段耗时"""
+
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = {}
+
+    def run(self, name, func, items=None, setup=None):
+        """执行 repeat 次 (每次前调用 setup)，记录全部耗时与中位数"""
+        runs = []
+        value = None
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            value = func()
+            runs.append(time.perf_counter() - start)
+
+        median = statistics.median(runs)
+        result = {"seconds": round(median, 6), "runs": [round(r, 6) for r in runs]}
+        if items:
+            result["items"] = items
+            result["items_per_sec"] = round(items / median, 1) if median else None
+        self.results[name] = result
+        rate = f" | {result['items_per_sec']:,.0f} 条/秒" if items else ""
+        print(f"  ⏱ {name:<28} {median * 1000:>10.1f} ms{rate}")
+        return value
+
+
+def load_script(module_name, filename):
+    """加载 src 下的脚本 (文件名含连字符，无法直接import)"""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(SRC_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def git_commit():
+    """当前提交哈希 (非git环境返回None)"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=SCRIPT_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --------------------
+# 基准阶段
+# --------------------
+def bench_xbot(bench, xbot, data, args, work_dir):
+    """X-Bot：分片加载、去重、合并与输出写入"""
+    print("📦 X-Bot")
+    shard_manager = xbot.ShardManager()
+    shard_manager.save_entry_ids(data.history_ids(args.history))
+    shard_manager.close()
+
+    timeline_path = os.path.join(work_dir, "timeline.json")
+    write_json_array(timeline_path, data.tweets(args.tweets))
+    output_path = os.path.join(work_dir, "output", "existing.json")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    existing = data.output_entries(args.existing)
+    write_json_array(output_path, existing)
+
+    def drop_index():
+        for name in (xbot.Config.INDEX_FILE, xbot.Config.INDEX_MANIFEST, xbot.Config.BLOOM_FILE):
+            path = os.path.join(xbot.Config.SHARD_DIR, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    bench.run("shard_load_set", lambda: len(xbot.ShardManager().load_processed_entries()), items=args.history)
+    bench.run("shard_index_build", lambda: len(xbot.ShardManager().load_processed_index()),
+              items=args.history, setup=drop_index)
+    index = bench.run("shard_index_warm", lambda: xbot.ShardManager().load_processed_index(), items=args.history)
+
+    core = xbot.XBotCore(load_index=False)
+    candidates, _ = bench.run("parse_dedup", lambda: core.collect_candidates(timeline_path), items=args.tweets)
+    get_id = xbot.XBotCore._get_entry_id
+    new_entries = bench.run(
+        "index_filter", lambda: [e for e in candidates if get_id(e) not in index], items=len(candidates)
+    )
+
+    merged = bench.run("merge_output", lambda: core._merge_output(output_path, new_entries),
+                       items=len(existing) + len(new_entries))
+    write_path = os.path.join(work_dir, "output", "merged.json")
+    bench.run("output_write", lambda: xbot.FileManager.save_output(merged, write_path), items=len(merged))
+    index.close()
+
+    # 端到端：每次运行前复制一份未写入的分片目录，避免重复运行相互影响
+    shard_dir = xbot.Config.SHARD_DIR.rstrip("/\\")
+    pristine = f"{shard_dir}.pristine"
+    shutil.copytree(shard_dir, pristine)
+
+    def reset_state():
+        shutil.rmtree(shard_dir)
+        shutil.copytree(pristine, shard_dir)
+        shutil.copyfile(output_path, write_path)
+
+    def process_day():
+        day_core = xbot.XBotCore()
+        count = day_core.process_single_day(timeline_path, write_path)
+        day_core.close()
+        return count
+
+    bench.run("process_single_day", process_day, items=args.tweets, setup=reset_state)
+
+
+def bench_tbot(bench, tbot, data, args, work_dir):
+    """T-Bot：当日文件加载、待处理条目扫描与状态写回"""
+    print("📦 T-Bot")
+    day_path = os.path.join(work_dir, "tbot", "day.json")
+    os.makedirs(os.path.dirname(day_path), exist_ok=True)
+    entries = data.output_entries(args.tbot_items)
+    write_json_array(day_path, entries)
+    download_dir = os.path.join(work_dir, "downloads")
+
+    processor = tbot.FileProcessor(day_path, download_dir)
+
+    def drop_pending_index():
+        if processor.pending_path.exists():
+            processor.pending_path.unlink()
+
+    def load_and_scan():
+        loaded = processor.load_data()
+        return loaded, processor.pending_items(loaded)
+
+    loaded, pending = bench.run("tbot_scan_full", load_and_scan, items=len(entries), setup=drop_pending_index)
+    bench.run("tbot_save_data", lambda: processor.save_data(loaded), items=len(entries))
+    bench.run("tbot_scan_indexed", load_and_scan, items=len(entries))
+
+    for item in loaded:
+        item["is_uploaded"] = True
+    processor.save_data(loaded)
+    bench.run("tbot_skip_check", lambda: tbot.FileProcessor.has_no_pending_work(day_path), items=len(entries))
+    bench.results["tbot_scan_full"]["pending"] = len(pending)
+
+
+# --------------------
+# 结果输出与对比
+# --------------------
+def compare(results, baseline_path):
+    """与历史结果逐阶段对比耗时"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n📊 对比基线: {baseline_path} (commit {str(baseline.get('commit'))[:10]})")
+    for name, result in results.items():
+        old = baseline.get("results", {}).get(name)
+        if not old or not old.get("seconds"):
+            print(f"  {name:<28} (基线无此项)")
+            continue
+        ratio = result["seconds"] / old["seconds"]
+        marker = "🐢" if ratio > 1.1 else "🚀" if ratio < 0.9 else "  "
+        print(f"  {marker} {name:<26} {old['seconds'] * 1000:>10.1f} → {result['seconds'] * 1000:>10.1f} ms ({ratio:.2f}x)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="X-Bot / T-Bot 基准测试")
+    parser.add_argument("--tweets", type=int, default=10000, help="合成时间线推文数 (1万~1000万)")
+    parser.add_argument("--users", type=int, default=200, help="合成用户数")
+    parser.add_argument("--history", type=int, default=100000, help="已处理分片历史条目数")
+    parser.add_argument("--existing", type=int, default=5000, help="已有输出文件条目数")
+    parser.add_argument("--tbot-items", type=int, default=20000, help="T-Bot当日文件条目数")
+    parser.add_argument("--dup-rate", type=float, default=0.1, help="与分片历史重复的媒体比例")
+    parser.add_argument("--repeat", type=int, default=3, help="每个阶段重复次数 (取中位数)")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--only", choices=["xbot", "tbot"], help="只运行指定部分")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR, help="结果JSON保存目录")
+    parser.add_argument("--compare", help="对比的历史结果JSON")
+    parser.add_argument("--keep", action="store_true", help="保留临时工作目录")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    started = datetime.now()
+    work_root = tempfile.mkdtemp(prefix="xt-bench-")
+    # 脚本使用 ../dataBase、../logs 等相对路径，在临时目录中模拟 Python/src 的位置
+    work_src = os.path.join(work_root, "src")
+    os.makedirs(work_src)
+    original_cwd = os.getcwd()
+    os.chdir(work_src)
+    sys.path.insert(0, SRC_DIR)
+
+    print(f"🧪 工作目录: {work_root}")
+    bench = Bench(max(1, args.repeat))
+    data = SyntheticData(args.users, args.seed, args.dup_rate)
+    try:
+        if args.only in (None, "xbot"):
+            xbot = load_script("x_bot", "X-Bot.py")
+            logging.getLogger().setLevel(logging.WARNING)  # 屏蔽逐条INFO日志对计时的影响
+            bench_xbot(bench, xbot, data, args, work_root)
+        if args.only in (None, "tbot"):
+            tbot = load_script("t_bot", "T-Bot.py")
+            logging.getLogger().setLevel(logging.WARNING)
+            bench_tbot(bench, tbot, data, args, work_root)
+    finally:
+        os.chdir(original_cwd)
+        if args.keep:
+            print(f"📁 已保留工作目录: {work_root}")
+        else:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": started.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("results_dir", "compare", "keep")},
+        "results": bench.results
+    }
+    os.makedirs(args.results_dir, exist_ok=True)
+    result_path = os.path.join(
+        args.results_dir, f"benchmark-{started.strftime('%Y-%m-%d_%H%M%S')}-{(commit or 'nogit')[:10]}.json"
+    )
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✓ 结果已保存: {result_path}")
+
+    if args.compare:
+        compare(bench.results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+T-Bot 吞吐压测驱动
+
+在后台线程启动本地模拟服务 (mock_server.py)，通过 MEDIA_BASE_URL / LARK_API_BASE 将 T-Bot 指向它，
+生成合成推送文件后完整执行一次 process_single，按阶段报告吞吐 (条/秒) 与单条耗时 p50/p99。
+
+用法：
+    python load_test.py                                   # 默认：200条，图片为主
+    python load_test.py --items 500 --async --bandwidth 1024 --latency 80
+    python load_test.py --webhook-rate 100 --lark-rate 0  # 使用T-Bot默认客户端限速，观察429退避
+    python load_test.py --drop-rate 0.2 --error-rate 0.05 # 验证续传与重试路径
+    python load_test.py --duplicate-rate 0.3 --workers 8  # 不同用户的同名媒体并发下载，校验文件内容
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+from benchmark import DEFAULT_RESULTS_DIR, SRC_DIR, git_commit, load_script
+from mock_server import MockServer, add_server_arguments, media_content, options_from_args
+
+
+# --------------------
+# 合成输入
+# --------------------
+def build_items(count, video_rate, text_rate, seed, duplicate_rate=0.0):
+    """生成待处理的推送条目 (X-Bot输出结构，媒体URL为原始twimg地址)
+
+    duplicate_rate 比例的条目复用此前条目的媒体 (同一 file_name，不同用户)，模拟多个监控用户转发同一媒体。
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    items = []
+    media = []
+    for i in range(count):
+        screen_name = f"load_user_{rng.randrange(50)}"
+        roll = rng.random()
+        if media and rng.random() < duplicate_rate:
+            media_type, file_name, url = rng.choice(media)
+        elif roll < text_rate:
+            media_type, file_name = "broadcasts", f"broadcast_{i:08d}"
+            url = f"https://x.com/i/broadcasts/{i:08d}"
+        elif roll < text_rate + video_rate:
+            media_type, file_name = "videos", f"V{i:012d}.mp4"
+            url = f"https://video.twimg.com/ext_tw_video/{file_name}?tag=12"
+        else:
+            media_type, file_name = "images", f"I{i:012d}.jpg"
+            url = f"https://pbs.twimg.com/media/{file_name}"
+        if media_type != "broadcasts":
+            media.append((media_type, file_name, url))
+        items.append({
+            "file_name": file_name,
+            "user": {"screen_name": screen_name, "name": screen_name.upper()},
+            "media_type": media_type,
+            "url": url,
+            "read_time": "2025-01-01 00:00:00",
+            "is_uploaded": False,
+            "upload_info": {},
+            "is_downloaded": False,
+            "download_info": {},
+            "full_text": "load test",
+            "publish_time": (start + timedelta(seconds=i)).strftime("%Y-%m-%dT%H:%M:%S")
+        })
+    return items
+
+
+def verify_downloads(data, download_dir, options):
+    """校验已下载文件与模拟服务内容逐字节一致，返回不一致的文件名"""
+    mismatched = []
+    for item in data:
+        if not item.get("is_downloaded") or item["media_type"] not in ("images", "videos"):
+            continue
+        parsed = urlparse(item["url"])
+        path = f"/{parsed.netloc}{parsed.path}"
+        size = options.video_size if path.lower().endswith(".mp4") else options.image_size
+        file_path = os.path.join(download_dir, item["file_name"])
+        with open(file_path, "rb") as f:
+            if f.read() != media_content(path, size=size):
+                mismatched.append(item["file_name"])
+    return sorted(set(mismatched))
+
+
+# --------------------
+# 阶段统计
+# --------------------
+class StageClock:
+    """记录阶段内各条目的起止时间，得到阶段吞吐与单条耗时分位数"""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.durations = []
+        self.first_start = None
+        self.last_end = None
+
+    def wrap(self, func):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                with self._lock:
+                    self.durations.append(end - start)
+                    self.first_start = start if self.first_start is None else min(self.first_start, start)
+                    self.last_end = end if self.last_end is None else max(self.last_end, end)
+        return wrapper
+
+    def summary(self):
+        if not self.durations:
+            return {"items": 0}
+        ordered = sorted(self.durations)
+        count = len(ordered)
+
+        def percentile(p):
+            return ordered[min(count - 1, int(p * count))]
+
+        span = self.last_end - self.first_start
+        return {
+            "items": count,
+            "seconds": round(span, 3),
+            "items_per_sec": round(count / span, 1) if span else None,
+            "p50_ms": round(percentile(0.50) * 1000, 1),
+            "p99_ms": round(percentile(0.99) * 1000, 1),
+            "max_ms": round(ordered[-1] * 1000, 1)
+        }
+
+
+def instrument(tbot):
+    """包装 DownloadManager/UploadManager.process_item (同步与异步流水线均经由此处)"""
+    download, upload = StageClock("download"), StageClock("upload")
+    download_item = tbot.DownloadManager.process_item.__func__
+    tbot.DownloadManager.process_item = classmethod(download.wrap(download_item))
+    tbot.UploadManager.process_item = upload.wrap(tbot.UploadManager.process_item)
+    return download, upload
+
+
+# --------------------
+# 主流程
+# --------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="T-Bot 下载/上传吞吐压测 (本地模拟服务)")
+    parser.add_argument("--items", type=int, default=200, help="条目数")
+    parser.add_argument("--video-rate", type=float, default=0.1, help="视频条目比例")
+    parser.add_argument("--text-rate", type=float, default=0.02, help="广播等纯文本条目比例")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="复用已有媒体(同名文件、不同用户)的条目比例")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="使用异步流水线")
+    parser.add_argument("--workers", type=int, default=None, help="DOWNLOAD_WORKERS (默认沿用T-Bot配置)")
+    parser.add_argument("--per-host", type=int, default=None, help="MAX_CONNECTIONS_PER_HOST")
+    parser.add_argument("--lark-rate", type=float, default=6000,
+                        help="T-Bot客户端LARK_RATE_PER_MIN (默认放开以测量链路本身，0为沿用T-Bot默认值)")
+    parser.add_argument("--cache", action="store_true", help="启用下载缓存 (默认关闭，避免命中缓存)")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR, help="结果JSON保存目录")
+    parser.add_argument("--keep", action="store_true", help="保留临时工作目录")
+    return add_server_arguments(parser).parse_args()
+
+
+def configure_env(args, server_url):
+    """T-Bot 在导入时读取配置，必须在加载脚本前设置环境变量"""
+    env = {
+        "MEDIA_BASE_URL": server_url,
+        "LARK_API_BASE": server_url,
+        "LARK_KEY": "mock-webhook",
+        "LARK_APP_ID": "cli_mock",
+        "LARK_APP_SECRET": "mock-secret",
+        "LARK_CHAT_ID": "oc_mock",
+        "DOWNLOAD_CACHE_ENABLED": "1" if args.cache else "0",
+        "LARK_TOKEN_CACHE_FILE": ""
+    }
+    if args.workers:
+        env["DOWNLOAD_WORKERS"] = str(args.workers)
+    if args.per_host:
+        env["MAX_CONNECTIONS_PER_HOST"] = str(args.per_host)
+    if args.lark_rate:
+        env["LARK_RATE_PER_MIN"] = str(args.lark_rate)
+        env["LARK_BURST"] = str(max(5, int(args.lark_rate // 60)))
+    os.environ.update(env)
+
+
+def print_stage(name, stats):
+    if not stats["items"]:
+        print(f"  {name:<8} 无条目")
+        return
+    print(
+        f"  {name:<8} {stats['items']:>6} 条 | {stats['items_per_sec']:>8,.1f} 条/秒 | "
+        f"p50 {stats['p50_ms']:>8.1f} ms | p99 {stats['p99_ms']:>8.1f} ms | max {stats['max_ms']:>8.1f} ms"
+    )
+
+
+def main():
+    args = parse_args()
+    started = datetime.now()
+    server = MockServer(options_from_args(args)).start()
+    configure_env(args, server.url)
+
+    work_root = tempfile.mkdtemp(prefix="tbot-load-")
+    # T-Bot 使用 ../logs、../cache 等相对路径，在临时目录中模拟 Python/src 的位置
+    work_src = os.path.join(work_root, "src")
+    os.makedirs(work_src)
+    original_cwd = os.getcwd()
+    os.chdir(work_src)
+    sys.path.insert(0, SRC_DIR)
+
+    print(f"🛰 模拟服务: {server.url} | 工作目录: {work_root}")
+    try:
+        tbot = load_script("t_bot", "T-Bot.py")
+        logging.getLogger().setLevel(logging.WARNING)  # 屏蔽逐条INFO日志
+        download, upload = instrument(tbot)
+
+        json_path = os.path.join(work_root, "output", "load.json")
+        os.makedirs(os.path.dirname(json_path))
+        with open(json_path, "w", encoding="utf-8") as f:
+            items = build_items(args.items, args.video_rate, args.text_rate, args.seed, args.duplicate_rate)
+            json.dump(items, f, ensure_ascii=False)
+
+        download_dir = os.path.join(work_root, "downloads")
+        start = time.perf_counter()
+        tbot.process_single(json_path, download_dir, use_async=args.use_async)
+        elapsed = time.perf_counter() - start
+
+        with open(json_path, encoding="utf-8") as f:
+            data = json.load(f)
+        mismatched = verify_downloads(data, download_dir, server.options)
+    finally:
+        os.chdir(original_cwd)
+        server.stop()
+        if args.keep:
+            print(f"📁 已保留工作目录: {work_root}")
+        else:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    results = {
+        "total": {
+            "items": len(data),
+            "seconds": round(elapsed, 3),
+            "items_per_sec": round(len(data) / elapsed, 1) if elapsed else None,
+            "downloaded": sum(1 for item in data if item.get("is_downloaded")),
+            "uploaded": sum(1 for item in data if item.get("is_uploaded")),
+            "corrupted": mismatched
+        },
+        "download": download.summary(),
+        "upload": upload.summary(),
+        "server": server.stats()
+    }
+
+    mode = "异步流水线" if args.use_async else "同步"
+    total = results["total"]
+    print(f"📊 {mode} | {total['items']} 条 | 总耗时 {total['seconds']:.2f} 秒 | {total['items_per_sec']:,.1f} 条/秒 | "
+          f"已下载 {total['downloaded']} | 已上传 {total['uploaded']}")
+    print_stage("download", results["download"])
+    print_stage("upload", results["upload"])
+    print(f"🛰 服务端统计: {json.dumps(results['server'], ensure_ascii=False)}")
+    if mismatched:
+        print(f"❌ 内容校验失败 {len(mismatched)} 个文件: {', '.join(mismatched[:10])}")
+    else:
+        print("✅ 已下载文件内容校验通过")
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": started.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("results_dir", "keep")},
+        "results": results
+    }
+    os.makedirs(args.results_dir, exist_ok=True)
+    result_path = os.path.join(
+        args.results_dir, f"loadtest-{started.strftime('%Y-%m-%d_%H%M%S')}-{(commit or 'nogit')[:10]}.json"
+    )
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✓ 结果已保存: {result_path}")
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""
+本地模拟服务：媒体CDN + 飞书开放平台
+
+为 T-Bot 吞吐测试提供离线替身，T-Bot 通过以下环境变量指向本服务：
+    MEDIA_BASE_URL=http://127.0.0.1:8800      # 媒体下载 (原始主机名作为路径首段保留)
+    LARK_API_BASE=http://127.0.0.1:8800       # 飞书 webhook / 令牌 / 图片文件上传 / 应用消息
+
+媒体CDN：
+- GET/HEAD 任意非 /open-apis 路径，内容按路径确定性生成 (.mp4 为视频大小，其余为图片大小)
+- 支持 Range / If-Range (强ETag)，可配置时延、单连接带宽、5xx错误率与中途断连率
+
+飞书接口：
+- POST /open-apis/auth/v3/tenant_access_token/internal
+- POST /open-apis/im/v1/images | /open-apis/im/v1/files (multipart，需Bearer令牌)
+- POST /open-apis/im/v1/messages
+- POST /open-apis/bot/v2/hook/<key> (可配置每分钟限额，超出返回429或频控错误码)
+
+用法：
+    python mock_server.py --port 8800 --latency 50 --bandwidth 2048 --error-rate 0.02 --webhook-rate 100
+    curl http://127.0.0.1:8800/__stats      # 查看请求统计
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+# --------------------
+# 配置
+# --------------------
+class MockOptions:
+    """模拟服务行为参数"""
+
+    def __init__(self, latency=0.0, jitter=0.0, bandwidth=0, error_rate=0.0, drop_rate=0.0,
+                 image_size=200 * 1024, video_size=5 * 1024 * 1024, webhook_rate=0.0,
+                 rate_limit_mode="status", api_latency=None, seed=None):
+        self.latency = latency  # 每个请求的固定时延(秒)
+        self.jitter = jitter  # 时延随机抖动上限(秒)
+        self.bandwidth = bandwidth  # 媒体响应单连接带宽(字节/秒，0为不限速)
+        self.error_rate = error_rate  # 媒体与上传请求返回503的比例
+        self.drop_rate = drop_rate  # 媒体响应传输一半后断开连接的比例 (用于验证续传)
+        self.image_size = image_size
+        self.video_size = video_size
+        self.webhook_rate = webhook_rate  # 每个webhook每分钟允许的消息数(0为不限)
+        self.rate_limit_mode = rate_limit_mode  # status: HTTP 429；code: HTTP 200 + 错误码9499
+        self.api_latency = latency if api_latency is None else api_latency  # 飞书接口时延(秒)
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+
+    def chance(self, rate):
+        """按比例随机命中"""
+        if rate <= 0:
+            return False
+        with self.rng_lock:
+            return self.rng.random() < rate
+
+    def delay(self, base):
+        """模拟网络时延"""
+        if base <= 0 and self.jitter <= 0:
+            return
+        with self.rng_lock:
+            extra = self.rng.uniform(0, self.jitter) if self.jitter > 0 else 0.0
+        time.sleep(base + extra)
+
+
+class WebhookLimiter:
+    """按webhook统计的滑动窗口限额 (模拟飞书自定义机器人频控)"""
+
+    WINDOW = 60.0
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self._lock = threading.Lock()
+        self._history = {}
+
+    def allow(self, key):
+        """未超限时记录一次并返回 (True, 0)，超限时返回 (False, 建议等待秒数)"""
+        if self.per_minute <= 0:
+            return True, 0
+        now = time.monotonic()
+        with self._lock:
+            sent = [t for t in self._history.get(key, []) if now - t < self.WINDOW]
+            if len(sent) >= self.per_minute:
+                self._history[key] = sent
+                return False, max(1, int(self.WINDOW - (now - sent[0])) + 1)
+            sent.append(now)
+            self._history[key] = sent
+            return True, 0
+
+
+# --------------------
+# 请求处理
+# --------------------
+class MockHandler(BaseHTTPRequestHandler):
+    """媒体CDN与飞书接口的请求处理器 (server 上挂载 options / limiter / stats)"""
+
+    protocol_version = "HTTP/1.1"  # 保持连接，便于观察客户端连接复用
+    server_version = "MockCDN/1.0"
+    disable_nagle_algorithm = True  # 响应头与响应体分两次写出，避免Nagle与延迟ACK叠加的约40ms额外时延
+    STREAM_CHUNK = 16 * 1024
+    RANGE_PATTERN = re.compile(r"bytes=(\d+)-(\d*)$")
+
+    def log_message(self, format, *args):
+        pass  # 压测时不逐条打印访问日志
+
+    # ---------- 分发 ----------
+    def do_HEAD(self):
+        self._count("media.head")
+        self._serve_media(head=True)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/__stats":
+            self._send_json(200, self.server.stats.snapshot())
+        else:
+            self._count("media.get")
+            self._serve_media(head=False)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._read_body()
+        options = self.server.options
+        options.delay(options.api_latency)
+
+        if path == "/open-apis/auth/v3/tenant_access_token/internal":
+            self._count("lark.token")
+            self._send_json(200, {
+                "code": 0, "msg": "ok",
+                "tenant_access_token": f"t-mock-{uuid.uuid4().hex}", "expire": 7200
+            })
+        elif path in ("/open-apis/im/v1/images", "/open-apis/im/v1/files"):
+            kind = "image" if path.endswith("images") else "file"
+            self._count(f"lark.upload_{kind}")
+            self.server.stats.incr("lark.upload_bytes", len(body))
+            if not self._authorized():
+                return
+            if options.chance(options.error_rate):
+                self._count("lark.upload_error")
+                self._send_json(503, {"code": 1, "msg": "mock service unavailable"})
+                return
+            self._send_json(200, {"code": 0, "msg": "success", "data": {f"{kind}_key": f"{kind}_mock_{uuid.uuid4().hex[:16]}"}})
+        elif path == "/open-apis/im/v1/messages":
+            self._count("lark.message")
+            if self._authorized():
+                self._send_json(200, {"code": 0, "msg": "success", "data": {"message_id": f"om_{uuid.uuid4().hex}"}})
+        elif path.startswith("/open-apis/bot/v2/hook/"):
+            self._handle_webhook(path.rsplit("/", 1)[-1])
+        else:
+            self._count("not_found")
+            self._send_json(404, {"code": 404, "msg": "not found"})
+
+    # ---------- 飞书 ----------
+    def _handle_webhook(self, key):
+        """自定义机器人消息：超出每分钟限额时按配置返回429或频控错误码"""
+        self._count("lark.webhook")
+        allowed, retry_after = self.server.limiter.allow(key)
+        if allowed:
+            self._send_json(200, {"code": 0, "msg": "success", "data": {}})
+            return
+
+        self._count("lark.webhook_rate_limited")
+        headers = {"Retry-After": str(retry_after)}
+        if self.server.options.rate_limit_mode == "code":
+            self._send_json(200, {"code": 9499, "msg": "too many request", "data": {}}, headers)
+        else:
+            self._send_json(429, {"code": 9499, "msg": "too many request"}, headers)
+
+    def _authorized(self):
+        """上传与应用消息接口要求Bearer令牌"""
+        if self.headers.get("Authorization", "").startswith("Bearer t-mock-"):
+            return True
+        self._count("lark.unauthorized")
+        self._send_json(401, {"code": 99991663, "msg": "invalid tenant access token"})
+        return False
+
+    # ---------- 媒体 ----------
+    def _serve_media(self, head):
+        """按路径生成确定性内容，支持 Range / If-Range"""
+        options = self.server.options
+        options.delay(options.latency)
+        if options.chance(options.error_rate):
+            self._count("media.error")
+            if head:
+                self._send_empty(503, {})
+            else:
+                self._send_json(503, {"error": "mock service unavailable"})
+            return
+
+        path = urlparse(self.path).path
+        size = options.video_size if path.lower().endswith(".mp4") else options.image_size
+        etag = '"%s"' % hashlib.sha1(f"{path}:{size}".encode()).hexdigest()[:16]
+        start, end, status = 0, size - 1, 200
+
+        match = self.RANGE_PATTERN.match(self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if match and (if_range is None or if_range == etag):
+            start = int(match.group(1))
+            if match.group(2):
+                end = min(int(match.group(2)), size - 1)
+            if start >= size or start > end:
+                self._count("media.range_unsatisfiable")
+                self._send_empty(416, {"Content-Range": f"bytes */{size}"})
+                return
+            status = 206
+            self._count("media.range")
+
+        headers = {
+            "Content-Type": "video/mp4" if size == options.video_size else "image/jpeg",
+            "Content-Length": str(end - start + 1),
+            "Accept-Ranges": "bytes",
+            "ETag": etag
+        }
+        if status == 206:
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if head:
+            return
+
+        drop_at = (end - start + 1) // 2 if options.chance(options.drop_rate) else None
+        self._stream(path, start, end, drop_at)
+
+    def _stream(self, path, start, end, drop_at):
+        """按带宽限制分块写出内容，drop_at 处模拟连接中断"""
+        options = self.server.options
+        chunk = self.STREAM_CHUNK
+        if options.bandwidth:
+            chunk = max(1024, min(chunk, options.bandwidth // 20))
+        seed = hashlib.sha256(path.encode()).digest()
+        block = (seed * (chunk // len(seed) + 2))
+
+        sent, position = 0, start
+        began = time.monotonic()
+        while position <= end:
+            length = min(chunk, end - position + 1)
+            if drop_at is not None and sent + length > drop_at:
+                length = drop_at - sent
+                self._write(block, position, length)
+                self.server.stats.incr("media.bytes", length)
+                self._count("media.dropped")
+                self.close_connection = True
+                self.connection.shutdown(socket.SHUT_RDWR)  # 内容未发完即断开
+                return
+            self._write(block, position, length)
+            sent += length
+            position += length
+            if options.bandwidth:
+                ahead = sent / options.bandwidth - (time.monotonic() - began)
+                if ahead > 0:
+                    time.sleep(ahead)
+        self.server.stats.incr("media.bytes", sent)
+
+    def _write(self, block, position, length):
+        """写出内容片段 (内容只由路径与偏移决定，续传拼接后与完整下载一致)"""
+        offset = position % 32
+        self.wfile.write(block[offset:offset + length])
+
+    # ---------- 工具 ----------
+    def _read_body(self):
+        """读取请求体 (支持Content-Length与chunked)"""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int(self.rfile.readline().strip().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                parts.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b"".join(parts)
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_empty(self, status, headers):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _count(self, name):
+        self.server.stats.incr(name)
+
+
+class ServerStats:
+    """请求计数与传输字节统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+
+# --------------------
+# 服务封装
+# --------------------
+def media_content(path, start=0, length=None, size=None):
+    """路径对应的媒体内容片段 (与服务端写出的字节一致，供压测驱动校验下载结果)"""
+    seed = hashlib.sha256(path.encode()).digest()
+    length = size - start if length is None else length
+    offset = start % len(seed)
+    return (seed * ((offset + length) // len(seed) + 1))[offset:offset + length]
+
+
+class MockServer:
+    """可在后台线程中启动的模拟服务 (供压测驱动直接调用)"""
+
+    def __init__(self, options=None, host="127.0.0.1", port=0):
+        self.options = options or MockOptions()
+        self.httpd = ThreadingHTTPServer((host, port), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.options = self.options
+        self.httpd.limiter = WebhookLimiter(self.options.webhook_rate)
+        self.httpd.stats = ServerStats()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self):
+        return self.httpd.stats.snapshot()
+
+
+def add_server_arguments(parser):
+    """模拟服务行为参数 (压测驱动复用)"""
+    group = parser.add_argument_group("模拟服务")
+    group.add_argument("--latency", type=float, default=20, help="媒体请求时延(毫秒)")
+    group.add_argument("--api-latency", type=float, default=None, help="飞书接口时延(毫秒，默认同--latency)")
+    group.add_argument("--jitter", type=float, default=0, help="时延随机抖动上限(毫秒)")
+    group.add_argument("--bandwidth", type=int, default=0, help="单连接带宽(KB/秒，0为不限)")
+    group.add_argument("--error-rate", type=float, default=0.0, help="媒体/上传请求返回503的比例")
+    group.add_argument("--drop-rate", type=float, default=0.0, help="媒体响应中途断连的比例")
+    group.add_argument("--image-size", type=int, default=200, help="图片大小(KB)")
+    group.add_argument("--video-size", type=int, default=5120, help="视频大小(KB)")
+    group.add_argument("--webhook-rate", type=float, default=0, help="每个webhook每分钟限额(0为不限)")
+    group.add_argument("--rate-limit-mode", choices=("status", "code"), default="status",
+                       help="超限响应：status=HTTP 429，code=HTTP 200 + 错误码9499")
+    group.add_argument("--seed", type=int, default=42, help="随机种子")
+    return parser
+
+
+def options_from_args(args):
+    return MockOptions(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        bandwidth=args.bandwidth * 1024,
+        error_rate=args.error_rate,
+        drop_rate=args.drop_rate,
+        image_size=args.image_size * 1024,
+        video_size=args.video_size * 1024,
+        webhook_rate=args.webhook_rate,
+        rate_limit_mode=args.rate_limit_mode,
+        api_latency=None if args.api_latency is None else args.api_latency / 1000,
+        seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="T-Bot 本地模拟服务 (媒体CDN + 飞书)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    args = add_server_arguments(parser).parse_args()
+
+    server = MockServer(options_from_args(args), args.host, args.port)
+    print(f"🛰 模拟服务已启动: {server.url}")
+    print(f"   export MEDIA_BASE_URL={server.url}")
+    print(f"   export LARK_API_BASE={server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"📊 请求统计: {json.dumps(server.stats(), ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()